@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party apps
     'rest_framework',
     'rest_framework_simplejwt',
@@ -83,6 +84,10 @@ MIDDLEWARE = [
 if find_spec('whitenoise') is not None:
     MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
 
+# Logs N+1 query patterns and query budget overruns (see store/querybudget.py)
+if _env_bool('QUERY_INSPECTION', default=DEBUG):
+    MIDDLEWARE.append('store.middleware.QueryInspectionMiddleware')
+
 ROOT_URLCONF = 'online_shop.urls'
 
 TEMPLATES = [
@@ -149,6 +154,29 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache
+# Local memory per process by default. Point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) so that cache version
+# bumps reach every worker at once.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Upper bound on how stale cached reference data (categories) can get, in seconds
+REFERENCE_CACHE_TIMEOUT = int(os.getenv('REFERENCE_CACHE_TIMEOUT', '300'))
+
+# How long a moderator keeps products claimed from the moderation queue, in seconds
+MODERATION_LEASE_SECONDS = int(os.getenv('MODERATION_LEASE_SECONDS', '600'))
+
+# Idle time after which an anonymous shopper's cart (held in the cache, not the
+# database) expires, in seconds. Needs a shared CACHE_BACKEND with several workers.
+GUEST_CART_TIMEOUT = int(os.getenv('GUEST_CART_TIMEOUT', str(7 * 24 * 60 * 60)))
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
@@ -158,6 +186,25 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Threads shared by all requests for writing uploaded product media in parallel
+MEDIA_WRITE_WORKERS = int(os.getenv('MEDIA_WRITE_WORKERS', '4'))
+
+# Processes per web worker that resize uploaded images into WebP thumbnails;
+# 0 leaves it to `manage.py generate_derivatives`
+MEDIA_DERIVATIVE_WORKERS = int(os.getenv('MEDIA_DERIVATIVE_WORKERS', '1'))
+
+# Resumable uploads: bytes per chunk, the largest file accepted, and how long an
+# unfinished upload is kept before `manage.py purge_uploads` discards it
+MEDIA_UPLOAD_CHUNK_SIZE = int(os.getenv('MEDIA_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+MEDIA_UPLOAD_MAX_SIZE = int(os.getenv('MEDIA_UPLOAD_MAX_SIZE', str(2 * 1024 ** 3)))
+MEDIA_UPLOAD_EXPIRY_HOURS = int(os.getenv('MEDIA_UPLOAD_EXPIRY_HOURS', '24'))
+
+# How /media/ is served: 'django' streams files itself (with Range support);
+# 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) let the front proxy
+# send the bytes. For nginx, map the prefix to MEDIA_ROOT in an `internal` location.
+MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
@@ -174,7 +221,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'store.pagination.PageNumberOrCursorPagination',
     'PAGE_SIZE': 10,
 }
 
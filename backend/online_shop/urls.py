@@ -14,23 +14,29 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 
 
 from store.views import (
-    RegisterView, VerifyEmailView, PasswordResetRequestView, PasswordResetConfirmView,
+    RegisterView, LoginView, VerifyEmailView, PasswordResetRequestView, PasswordResetConfirmView,
     ChangePasswordView, UserListView, UserDetailView, BlockUserView, CurrentUserView, AdminStatsView,
     CategoryListView, CategoryDetailView, ProductListView, ProductDetailView,
-    MyProductsView, ApproveProductView, RejectProductView, PendingProductsView, ProductSearchView,
-    CartView, AddToCartView, UpdateCartItemView, RemoveCartItemView, ClearCartView,
+    MyProductsView, ApproveProductView, RejectProductView, BulkModerateProductsView, PendingProductsView,
+    ModerationQueueClaimView, ModerationQueueReleaseView,
+    ProductSearchView, ProductSuggestView, ProductChangesView,
+    CartView, AddToCartView, CartBatchView, UpdateCartItemView, RemoveCartItemView, ClearCartView,
+    GuestCartView, GuestCartBatchView,
+    MediaUploadListView, MediaUploadDetailView, MediaUploadChunkView, MediaUploadCompleteView,
     CheckoutView, OrderListView, OrderDetailView, CancelOrderView,
     InitiatePaymentView, PaymentCallbackView, PaymentListView, PaymentDetailView,
     HomeView
 )
+from store.serving import serve_media
 
 urlpatterns = [
     # Home - redirect to frontend
@@ -41,7 +47,7 @@ urlpatterns = [
     
     # Authentication
     path('api/auth/register/', RegisterView.as_view(), name='register'),
-    path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/auth/login/', LoginView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/me/', CurrentUserView.as_view(), name='current-user'),
     
@@ -58,18 +64,32 @@ urlpatterns = [
     # Products
     path('api/products/', ProductListView.as_view(), name='product-list'),
     path('api/products/search/', ProductSearchView.as_view(), name='product-search'),
+    path('api/products/suggest/', ProductSuggestView.as_view(), name='product-suggest'),
+    path('api/products/changes/', ProductChangesView.as_view(), name='product-changes'),
     path('api/products/my/', MyProductsView.as_view(), name='my-products'),
+    path('api/products/moderate/', BulkModerateProductsView.as_view(), name='moderate-products'),
+    path('api/products/moderation-queue/claim/', ModerationQueueClaimView.as_view(), name='moderation-queue-claim'),
+    path('api/products/moderation-queue/release/', ModerationQueueReleaseView.as_view(), name='moderation-queue-release'),
     path('api/products/<str:product_id>/approve/', ApproveProductView.as_view(), name='approve-product'),
     path('api/products/<str:product_id>/reject/', RejectProductView.as_view(), name='reject-product'),
     path('api/products/pending/', PendingProductsView.as_view(), name='pending-products'),
     path('api/products/<str:pk>/', ProductDetailView.as_view(), name='product-detail'),
     
+    # Resumable media uploads
+    path('api/uploads/', MediaUploadListView.as_view(), name='upload-list'),
+    path('api/uploads/<uuid:pk>/', MediaUploadDetailView.as_view(), name='upload-detail'),
+    path('api/uploads/<uuid:pk>/chunks/<int:index>/', MediaUploadChunkView.as_view(), name='upload-chunk'),
+    path('api/uploads/<uuid:pk>/complete/', MediaUploadCompleteView.as_view(), name='upload-complete'),
+    
     # Cart
     path('api/cart/', CartView.as_view(), name='cart'),
     path('api/cart/add/', AddToCartView.as_view(), name='add-to-cart'),
+    path('api/cart/batch/', CartBatchView.as_view(), name='cart-batch'),
     path('api/cart/items/<int:pk>/', UpdateCartItemView.as_view(), name='update-cart-item'),
     path('api/cart/items/<int:pk>/remove/', RemoveCartItemView.as_view(), name='remove-cart-item'),
     path('api/cart/clear/', ClearCartView.as_view(), name='clear-cart'),
+    path('api/guest-cart/', GuestCartView.as_view(), name='guest-cart'),
+    path('api/guest-cart/batch/', GuestCartBatchView.as_view(), name='guest-cart-batch'),
     
     # Orders
     path('api/orders/checkout/', CheckoutView.as_view(), name='checkout'),
@@ -92,9 +112,10 @@ urlpatterns = [
     path('api/auth/verify-email/<str:uidb64>/<str:token>/', VerifyEmailView.as_view(), name='verify-email'),
 ]
 
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media: streamed by Django (with Range support) or offloaded to the front proxy, see MEDIA_SERVE_MODE
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$', serve_media, name='media'),
+]
 
 
 
@@ -27,7 +27,7 @@ class UserProfileAdmin(StyledAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(StyledAdmin):
-    list_display = ['id', 'name', 'created_at']
+    list_display = ['id', 'name', 'approved_products_count', 'pending_products_count', 'created_at']
     search_fields = ['name']
 
 
@@ -0,0 +1,266 @@
+"""
+Benchmark scenarios for `manage.py benchmark`.
+
+Each scenario is a function that may seed data and returns a list of
+(label, callable) pairs to time. The command runs everything inside a
+transaction that is rolled back, so seeded rows never persist.
+"""
+import random
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from .carts import apply_cart_operations
+from .checkout import checkout
+
+from .facets import compute_facets, price_bucket_ranges
+from .filters import search_products
+from .models import Cart, CartItem, Category, Order, OrderItem, Payment, Product, ProductListing
+from .serializers import ProductListSerializer, ProductListingSerializer
+
+User = get_user_model()
+
+SCENARIOS = {}
+
+WORDS = (
+    'phone laptop charger cable shoes shirt dress watch camera lens bag '
+    'kettle blender sofa table chair lamp mattress bicycle helmet guitar '
+    'speaker headphones tablet printer router keyboard mouse monitor '
+    'vintage leather wireless portable smart classic organic handmade'
+).split()
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def _sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def _images(rng):
+    return [f'/media/products/images/bench-{uuid.uuid4().hex[:12]}.jpg' for _ in range(rng.randint(1, 4))]
+
+
+def seed_user(role=User.Role.CUSTOMER):
+    return User.objects.create_user(
+        username=f'bench-{uuid.uuid4().hex[:8]}', email='bench@example.com', password=None, role=role
+    )
+
+
+def seed_products(rows, seed=0, owner=None, status=Product.Status.APPROVED, categories=8):
+    """Bulk insert `rows` products spread over a few categories"""
+    if rows <= 0:
+        return
+    rng = random.Random(seed)
+    owner = owner or seed_user()
+    categories = [
+        Category.objects.get_or_create(name=f'Bench {i}')[0] for i in range(categories)
+    ]
+    batch = []
+    for _ in range(rows):
+        batch.append(Product(
+            name=_sentence(rng, 3).title(),
+            description=_sentence(rng, 40),
+            price=Decimal(rng.randint(100, 500000)) / 100,
+            category=rng.choice(categories),
+            images=_images(rng),
+            status=status,
+            owner=owner,
+        ))
+        if len(batch) >= 5000:
+            Product.objects.bulk_create(batch)
+            batch = []
+    Product.objects.bulk_create(batch)
+
+
+def seed_store(rows):
+    """
+    A customer with `rows` products, cart lines, orders and payments, an admin,
+    and `rows` extra users, for exercising every list endpoint at a given volume.
+    """
+    customer = seed_user()
+    admin = seed_user(role=User.Role.ADMIN)
+    seed_products(rows, owner=customer, categories=max(1, min(rows, 200)))
+    seed_products(rows, owner=customer, status=Product.Status.PENDING, categories=1)
+    products = list(Product.objects.filter(owner=customer, status=Product.Status.APPROVED)[:rows])
+
+    cart = Cart.objects.create(user=customer)
+    CartItem.objects.bulk_create(CartItem(cart=cart, product=product) for product in products)
+
+    orders = Order.objects.bulk_create(
+        Order(order_id=f'ORD-{uuid.uuid4().hex[:8].upper()}', customer=customer, total_amount=product.price)
+        for product in products
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product=product, price=product.price)
+        for order, product in zip(orders, products)
+    )
+    Payment.objects.bulk_create(
+        Payment(
+            transaction_id=f'TXN-{uuid.uuid4().hex[:12].upper()}', order=order, user=customer,
+            amount=order.total_amount, phone_number='254700000000',
+        )
+        for order in orders
+    )
+    User.objects.bulk_create(
+        User(username=f'bench-user-{uuid.uuid4().hex[:12]}', email='bench@example.com')
+        for _ in range(rows)
+    )
+    return {'customer': customer, 'admin': admin}
+
+
+def seed_marketplace(rows, seed=0):
+    """
+    A realistically shaped store: `rows` products over many sellers, categories
+    and statuses, plus orders, payments and carts spread over many customers.
+    Returns a sample customer, seller and category for targeted lookups.
+    """
+    rng = random.Random(seed)
+    users = User.objects.bulk_create(
+        User(username=f'bench-{uuid.uuid4().hex[:12]}', email='bench@example.com')
+        for _ in range(max(10, rows // 20))
+    )
+    categories = Category.objects.bulk_create(
+        Category(name=f'Bench {uuid.uuid4().hex[:8]}') for _ in range(50)
+    )
+    statuses = [Product.Status.APPROVED] * 7 + [Product.Status.PENDING] * 2 + [Product.Status.REJECTED]
+    products = Product.objects.bulk_create(
+        Product(
+            name=_sentence(rng, 3).title(),
+            description=_sentence(rng, 20),
+            price=Decimal(rng.randint(100, 500000)) / 100,
+            category=rng.choice(categories),
+            images=_images(rng),
+            status=rng.choice(statuses),
+            owner=rng.choice(users),
+        )
+        for _ in range(rows)
+    )
+    orders = Order.objects.bulk_create(
+        Order(
+            order_id=f'ORD-{uuid.uuid4().hex[:8].upper()}', customer=rng.choice(users),
+            total_amount=Decimal(rng.randint(100, 500000)) / 100,
+        )
+        for _ in range(rows)
+    )
+    Payment.objects.bulk_create(
+        Payment(
+            transaction_id=f'TXN-{uuid.uuid4().hex[:12].upper()}', order=order, user=order.customer,
+            amount=order.total_amount, phone_number='254700000000',
+        )
+        for order in orders
+    )
+    carts = Cart.objects.bulk_create(Cart(user=user) for user in users)
+    CartItem.objects.bulk_create(
+        CartItem(cart=cart, product=product)
+        for cart in carts
+        for product in rng.sample(products, 3)
+    )
+    return {'user': rng.choice(users), 'category': rng.choice(categories)}
+
+
+def _first_page(queryset, page_size=10):
+    return list(queryset[:page_size]), queryset.count()
+
+
+@scenario('search')
+def search_scenario(options):
+    seed_products(options['rows'])
+    term = options['term'] or 'leather'
+    approved = Product.objects.filter(status=Product.Status.APPROVED)
+    legacy = approved.filter(Q(name__icontains=term) | Q(description__icontains=term))
+    return [
+        ('SearchFilter (ILIKE)', lambda: _first_page(legacy)),
+        ('full-text (GIN)', lambda: _first_page(search_products(approved, term))),
+    ]
+
+
+def _facets_one_query_per_facet(queryset):
+    """What clients had to do before: one COUNT per category and per price bucket"""
+    counts = [queryset.filter(category=category).count() for category in Category.objects.all()]
+    for low, high in price_bucket_ranges():
+        bucket = queryset
+        if low is not None:
+            bucket = bucket.filter(price__gte=low)
+        if high is not None:
+            bucket = bucket.filter(price__lt=high)
+        counts.append(bucket.count())
+    return counts
+
+
+@scenario('facets')
+def facets_scenario(options):
+    seed_products(options['rows'])
+    approved = Product.objects.filter(status=Product.Status.APPROVED)
+    searched = search_products(approved, options['term'] or 'leather', order_by_rank=False)
+    category = Category.objects.get(name='Bench 0').pk
+    return [
+        ('per-facet COUNT queries', lambda: _facets_one_query_per_facet(approved)),
+        ('single grouped aggregate', lambda: compute_facets(approved)),
+        ('grouped aggregate + search', lambda: compute_facets(searched)),
+        ('grouped aggregate, category filtered', lambda: compute_facets(approved.filter(category=category))),
+        ('grouped aggregate, category selected', lambda: compute_facets(approved, category=category)),
+        ('grouped aggregate + search, category selected', lambda: compute_facets(searched, category=category)),
+    ]
+
+
+@scenario('catalog')
+def catalog_scenario(options):
+    seed_products(options['rows'])
+    approved = Product.objects.filter(status=Product.Status.APPROVED).select_related('owner', 'category')
+
+    def render(queryset, serializer_class):
+        rows, total = _first_page(queryset.order_by('-date_posted'), page_size=24)
+        return serializer_class(rows, many=True).data, total
+
+    return [
+        ('products + owner/category joins', lambda: render(approved, ProductListSerializer)),
+        ('ProductListing read model', lambda: render(ProductListing.objects.all(), ProductListingSerializer)),
+    ]
+
+
+class _Undo(Exception):
+    pass
+
+
+def _undone(func):
+    """Run func in a savepoint that is rolled back, so every iteration starts from the same cart"""
+    def run():
+        try:
+            with transaction.atomic():
+                func()
+                raise _Undo
+        except _Undo:
+            pass
+    return run
+
+
+def _checkout_per_item(user):
+    """What CheckoutView did before: a Python total and one INSERT (and product fetch) per line"""
+    cart = Cart.objects.get(user=user)
+    items = list(cart.items.all())
+    order = Order.objects.create(customer=user, total_amount=sum(item.subtotal for item in items))
+    for item in items:
+        OrderItem.objects.create(order=order, product=item.product, quantity=item.quantity, price=item.product.price)
+    cart.items.all().delete()
+    return order
+
+
+@scenario('checkout')
+def checkout_scenario(options):
+    seed_products(max(options['rows'], 200))
+    products = list(Product.objects.filter(status=Product.Status.APPROVED).values_list('pk', flat=True)[:200])
+    cases = []
+    for lines in (1, 20, 200):
+        user = seed_user()
+        apply_cart_operations(user, [{'op': 'add', 'product_id': pk, 'quantity': 2} for pk in products[:lines]])
+        cases.append((f'per-item checkout, {lines} lines', _undone(lambda user=user: _checkout_per_item(user))))
+        cases.append((f'set-based checkout, {lines} lines', _undone(lambda user=user: checkout(user))))
+    return cases
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Category
+
+
+class VersionedCache:
+    """
+    A namespace of cache entries sharing one version stamp.
+
+    Keys embed the current version, so bump() makes every entry in the
+    namespace unreachable at once, in every worker sharing the cache backend,
+    without scanning or deleting keys; orphaned entries simply expire.
+    """
+
+    def __init__(self, namespace, timeout=None, alias='default'):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def version_key(self):
+        return f'{self.namespace}:version'
+
+    def version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # Time-based so an evicted stamp never resurrects old entries
+            version = time.time_ns()
+            if not self.cache.add(self.version_key, version, None):
+                version = self.cache.get(self.version_key, version)
+        return version
+
+    def get_or_set(self, name, factory):
+        key = f'{self.namespace}:{self.version()}:{name}'
+        return self.cache.get_or_set(key, factory, self.timeout)
+
+    def bump(self):
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, time.time_ns(), None)
+
+
+category_cache = VersionedCache('categories', timeout=settings.REFERENCE_CACHE_TIMEOUT)
+
+
+def cached_categories():
+    """All categories, ordered as Category.Meta.ordering"""
+    return category_cache.get_or_set('all', lambda: list(Category.objects.all()))
+
+
+def category_id_for_name(name):
+    ids_by_name = category_cache.get_or_set(
+        'ids-by-name', lambda: dict(Category.objects.values_list('name', 'id'))
+    )
+    return ids_by_name.get(name)
@@ -0,0 +1,146 @@
+"""
+Reading and changing carts.
+
+A cart's item count and subtotal are kept on the Cart row by database
+triggers, so badges and validators read one row and never touch the items.
+A full cart costs one more query: its items joined to their products,
+categories and owners, with the primary image as a subquery.
+
+Writes are set-based upserts, so concurrent adds to the same cart (double
+clicks, parallel tabs) add up instead of losing increments. Every writer
+locks the cart row before touching its items (checkout locks the products
+first), so concurrent cart writers queue rather than deadlock.
+"""
+from django.db import connection, transaction
+
+from .models import Cart, CartItem, Product
+from .product_media import primary_image_subquery, set_primary_media
+
+
+def get_cart(user):
+    """The user's cart with its totals; an unsaved empty cart until they add something"""
+    return Cart.objects.filter(user=user).first() or Cart(user=user)
+
+
+def lock_cart(user):
+    """Lock and return the user's cart row (None if they have no cart); call inside a transaction"""
+    return Cart.objects.select_for_update().filter(user=user).first()
+
+
+def cart_items(cart):
+    """The cart's items, ready for CartItemSerializer; no query for an empty cart"""
+    if not cart.item_count:
+        return []
+    items = list(
+        CartItem.objects.filter(cart=cart)
+        .select_related('product__owner', 'product__category')
+        .defer('product__images', 'product__videos')
+        .annotate(primary_image=primary_image_subquery('product'))
+        .order_by('created_at', 'pk')
+    )
+    for item in items:
+        set_primary_media(item.product, item.primary_image)
+    return items
+
+
+def load_cart(user):
+    """The user's cart with its items in `lines`, as CartSerializer renders it"""
+    cart = get_cart(user)
+    cart.lines = cart_items(cart)
+    return cart
+
+
+# Creates the cart on first use (the no-op DO UPDATE makes RETURNING yield the
+# existing row) and adds to the item, all only if the product is approved
+ADD_TO_CART = f"""
+WITH product AS (
+    SELECT id FROM {Product._meta.db_table} WHERE id = %(product)s AND status = %(approved)s
+), cart AS (
+    INSERT INTO {Cart._meta.db_table} AS c (user_id, created_at, updated_at, item_count, subtotal)
+    SELECT %(user)s, now(), now(), 0, 0 FROM product
+    ON CONFLICT (user_id) DO UPDATE SET user_id = c.user_id
+    RETURNING id
+)
+INSERT INTO {CartItem._meta.db_table} AS i (cart_id, product_id, quantity, created_at)
+SELECT cart.id, product.id, %(quantity)s, now() FROM cart, product
+ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = i.quantity + EXCLUDED.quantity
+RETURNING i.quantity
+"""
+
+
+def add_to_cart(user, product_id, quantity):
+    """
+    Add `quantity` of an approved product to the user's cart in one
+    statement. Returns the item's new quantity, or None if the product does
+    not exist or is not approved.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_TO_CART, {
+            'user': user.pk, 'product': product_id, 'quantity': quantity, 'approved': Product.Status.APPROVED,
+        })
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+# Locks the cart row, so concurrent batches on one cart apply one after the other
+LOCK_CART = f"""
+INSERT INTO {Cart._meta.db_table} AS c (user_id, created_at, updated_at, item_count, subtotal)
+VALUES (%s, now(), now(), 0, 0)
+ON CONFLICT (user_id) DO UPDATE SET user_id = c.user_id
+RETURNING id
+"""
+
+# Products that are gone or no longer approved are skipped, which matters for
+# guest carts merged on login (their products were checked days ago, if ever)
+# and for batches (validated before the cart was locked)
+_UPSERT_CART_ITEMS = f"""
+INSERT INTO {CartItem._meta.db_table} AS i (cart_id, product_id, quantity, created_at)
+SELECT %s, p.id, t.quantity, now()
+FROM unnest(%s::uuid[], %s::integer[]) AS t(product_id, quantity)
+JOIN {Product._meta.db_table} AS p ON p.id = t.product_id AND p.status = %s
+ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {{quantity}}
+"""
+ADD_CART_ITEMS = _UPSERT_CART_ITEMS.format(quantity='i.quantity + EXCLUDED.quantity')
+SET_CART_ITEMS = _UPSERT_CART_ITEMS.format(quantity='EXCLUDED.quantity')
+
+
+def fold_cart_operations(operations):
+    """
+    Reduce add/set/remove operations, in order, to one change per product:
+    ('set', n) for an absolute quantity (0 removes the item) or ('add', n)
+    on top of whatever the cart already holds.
+    """
+    changes = {}
+    for operation in operations:
+        product_id = operation['product_id']
+        if operation['op'] == 'remove':
+            changes[product_id] = ('set', 0)
+        elif operation['op'] == 'set':
+            changes[product_id] = ('set', operation['quantity'])
+        else:
+            mode, quantity = changes.get(product_id, ('add', 0))
+            changes[product_id] = (mode, quantity + operation['quantity'])
+    return changes
+
+
+def apply_cart_operations(user, operations):
+    """
+    Apply validated operations to the user's cart in one transaction: one
+    DELETE for removals, one upsert for absolute quantities and one for
+    increments, whatever the number of operations. The upserts re-check that
+    each product is still approved, skipping any that no longer are.
+    """
+    changes = fold_cart_operations(operations)
+    removed = [pk for pk, (mode, quantity) in changes.items() if mode == 'set' and quantity == 0]
+    absolute = {pk: quantity for pk, (mode, quantity) in changes.items() if mode == 'set' and quantity > 0}
+    added = {pk: quantity for pk, (mode, quantity) in changes.items() if mode == 'add'}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(LOCK_CART, [user.pk])
+        cart_id = cursor.fetchone()[0]
+        if removed:
+            CartItem.objects.filter(cart_id=cart_id, product_id__in=removed).delete()
+        if absolute:
+            cursor.execute(SET_CART_ITEMS, [cart_id, list(absolute), list(absolute.values()), Product.Status.APPROVED])
+        if added:
+            cursor.execute(ADD_CART_ITEMS, [cart_id, list(added), list(added.values()), Product.Status.APPROVED])
@@ -0,0 +1,88 @@
+"""
+Incremental catalog change feed.
+
+Clients keep a local copy of the catalog and ask for what changed after a
+cursor. Entries come from the ProductChange log, ordered by the id of the
+transaction that wrote them. A transaction that started earlier can commit
+later, so the feed only returns entries from transactions older than every
+transaction still running (the snapshot's xmin): anything that commits
+later is guaranteed to sort after the returned cursor, so no change is
+ever skipped. Entries are collapsed to the latest per product and approved
+products are rendered from the ProductListing read model.
+"""
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import ProductChange, ProductListing
+
+# Oldest transaction that may still be running; everything below it has finished
+SETTLED_TXID = RawSQL('pg_snapshot_xmin(pg_current_snapshot())::text::bigint', [])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(change):
+    return f'{change.txid}.{change.id}'
+
+
+def decode_cursor(cursor):
+    """(txid, id) from a cursor, with '0' or an empty cursor meaning the beginning"""
+    if not cursor or cursor == '0':
+        return 0, 0
+    try:
+        txid, change_id = (int(part) for part in cursor.split('.'))
+    except ValueError:
+        raise InvalidCursor(cursor)
+    if txid < 0 or change_id < 0:
+        raise InvalidCursor(cursor)
+    return txid, change_id
+
+
+def changes_after(txid, change_id):
+    # txid__gte gives the product_change_cursor scan its start key
+    return ProductChange.objects.filter(
+        Q(txid__gte=txid) & (Q(txid__gt=txid) | Q(txid=txid, id__gt=change_id))
+    )
+
+
+def read_changes(cursor, limit):
+    """
+    Up to `limit` log entries after `cursor`. Returns (changes, listings,
+    next cursor, has_more): the latest change per product in log order and
+    the listing rows of the products among them that are still approved.
+    """
+    txid, change_id = decode_cursor(cursor)
+    entries = list(changes_after(txid, change_id).filter(txid__lt=SETTLED_TXID).order_by('txid', 'id')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if not entries:
+        return [], {}, cursor or '0', False
+
+    latest = {}
+    for entry in entries:
+        latest.pop(entry.product_id, None)  # re-insert so the product moves to its latest position
+        latest[entry.product_id] = entry
+    approved = [pk for pk, entry in latest.items() if entry.status == ProductChange.Status.APPROVED]
+    listings = ProductListing.objects.in_bulk(approved) if approved else {}
+    return list(latest.values()), listings, encode_cursor(entries[-1]), has_more
+
+
+def compact_changes():
+    """
+    Delete entries superseded by a later entry for the same product. Always
+    safe: a client behind the deleted entry still reaches the later one.
+    Returns the number of entries removed.
+    """
+    superseded = RawSQL(
+        f"""
+        SELECT id FROM (
+            SELECT id, row_number() OVER (PARTITION BY product_id ORDER BY txid DESC, id DESC) AS newer
+            FROM {ProductChange._meta.db_table}
+        ) AS ranked
+        WHERE newer > 1
+        """,
+        [],
+    )
+    return ProductChange.objects.filter(id__in=superseded).delete()[0]
@@ -0,0 +1,103 @@
+"""
+Checkout: turning a cart into an order.
+
+One transaction with the same handful of statements whatever the cart size:
+
+1. Load the cart items with their products, locking the products (FOR NO
+   KEY UPDATE, in product id order) so prices cannot change under the
+   order and concurrent checkouts sharing products queue instead of
+   deadlocking. Cart additions only take key-share locks, which do not
+   conflict.
+2. Lock the cart row, which every cart writer takes before its items.
+3. Delete the items, returning what was really in the cart (a second
+   checkout of the same cart finds nothing) with prices and the total
+   computed in SQL.
+4. Insert the order, then all of its items with one bulk_create.
+
+If a product was added between steps 1 and 2 its price is not pinned, so
+the transaction is rolled back and retried with the new cart.
+
+The confirmation email goes out after the transaction commits.
+"""
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import connection, transaction
+
+from .models import Cart, CartItem, Order, OrderItem, Product
+
+logger = logging.getLogger(__name__)
+
+TAKE_CART_ITEMS = f"""
+WITH taken AS (
+    DELETE FROM {CartItem._meta.db_table} WHERE cart_id = %s RETURNING product_id, quantity
+)
+SELECT t.product_id, t.quantity, p.price, sum(t.quantity * p.price) OVER ()
+FROM taken AS t
+JOIN {Product._meta.db_table} AS p ON p.id = t.product_id
+ORDER BY t.product_id
+"""
+
+
+class CheckoutError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class _CartChanged(Exception):
+    pass
+
+
+def checkout(user, attempts=3):
+    """Create a pending order from the user's cart and empty it. Raises CheckoutError."""
+    for _ in range(attempts):
+        try:
+            return _checkout(user)
+        except _CartChanged:
+            continue
+    raise CheckoutError('Your cart changed during checkout, please review it and try again', 409)
+
+
+def _checkout(user):
+    with transaction.atomic():
+        items = list(
+            CartItem.objects.filter(cart__user=user)
+            .select_related('product').only('product', 'quantity', 'product__price')
+            .order_by('product_id')
+            .select_for_update(of=('product',), no_key=True)
+        )
+        locked = {item.product_id for item in items}
+        cart_id = Cart.objects.select_for_update().filter(user=user).values_list('pk', flat=True).first()
+        if cart_id is None:
+            raise CheckoutError('Cart not found', 404)
+
+        with connection.cursor() as cursor:
+            cursor.execute(TAKE_CART_ITEMS, [cart_id])
+            lines = cursor.fetchall()
+        if not lines:
+            raise CheckoutError('Cart is empty', 400)
+        if any(product_id not in locked for product_id, _, _, _ in lines):
+            raise _CartChanged
+
+        order = Order.objects.create(customer=user, total_amount=lines[0][3])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+            for product_id, quantity, price, _ in lines
+        ])
+        transaction.on_commit(lambda: send_order_confirmation(order, user), robust=True)
+    return order
+
+
+def send_order_confirmation(order, user):
+    if not user.email:
+        return
+    send_mail(
+        f'Order Confirmation - {order.order_id}',
+        f'Thank you for your order!\n\nOrder ID: {order.order_id}\nTotal Amount: KES {order.total_amount}\nStatus: {order.status}\n\nYou will receive a payment confirmation once payment is processed.',
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email],
+        fail_silently=False,
+    )
+    logger.info('Sent order confirmation for %s', order.order_id)
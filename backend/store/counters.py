@@ -0,0 +1,62 @@
+from django.db import connection, transaction
+
+from .models import Cart, CartItem, Category, Product
+
+RECOMPUTE_CATEGORY_COUNTS = f"""
+UPDATE {Category._meta.db_table} AS c
+SET total_products_count = coalesce(s.total, 0),
+    approved_products_count = coalesce(s.approved, 0),
+    pending_products_count = coalesce(s.pending, 0)
+FROM {Category._meta.db_table} AS c2
+LEFT JOIN (
+    SELECT category_id,
+           count(*) AS total,
+           count(*) FILTER (WHERE status = %s) AS approved,
+           count(*) FILTER (WHERE status = %s) AS pending
+    FROM {Product._meta.db_table}
+    WHERE category_id IS NOT NULL
+    GROUP BY category_id
+) AS s ON s.category_id = c2.id
+WHERE c.id = c2.id
+  AND (c.total_products_count, c.approved_products_count, c.pending_products_count)
+      IS DISTINCT FROM (coalesce(s.total, 0), coalesce(s.approved, 0), coalesce(s.pending, 0))
+"""
+
+
+def recompute_category_counts():
+    """
+    Rebuild every category's product counters with a single GROUP BY.
+    Product writes are held off for the duration so the result is exact.
+    Returns the number of categories whose counters were wrong.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {Product._meta.db_table} IN SHARE MODE')
+        cursor.execute(RECOMPUTE_CATEGORY_COUNTS, [Product.Status.APPROVED, Product.Status.PENDING])
+        return cursor.rowcount
+
+
+RECOMPUTE_CART_TOTALS = f"""
+UPDATE {Cart._meta.db_table} AS c
+SET item_count = coalesce(s.item_count, 0), subtotal = coalesce(s.subtotal, 0)
+FROM {Cart._meta.db_table} AS c2
+LEFT JOIN (
+    SELECT i.cart_id, count(*) AS item_count, sum(i.quantity * p.price) AS subtotal
+    FROM {CartItem._meta.db_table} AS i
+    JOIN {Product._meta.db_table} AS p ON p.id = i.product_id
+    GROUP BY i.cart_id
+) AS s ON s.cart_id = c2.id
+WHERE c.id = c2.id
+  AND (c.item_count, c.subtotal) IS DISTINCT FROM (coalesce(s.item_count, 0), coalesce(s.subtotal, 0))
+"""
+
+
+def recompute_cart_totals():
+    """
+    Rebuild every cart's item count and subtotal with a single GROUP BY,
+    holding off cart item and price writes. Returns the number of carts
+    whose totals were wrong.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {CartItem._meta.db_table}, {Product._meta.db_table} IN SHARE MODE')
+        cursor.execute(RECOMPUTE_CART_TOTALS)
+        return cursor.rowcount
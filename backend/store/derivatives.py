@@ -0,0 +1,167 @@
+"""
+Resized WebP derivatives of product images.
+
+Every image gets a small `thumb` for cards and a `large` WebP re-encode for
+detail views, stored next to the original as `<stem>.<name>.webp`. They are
+generated in a process pool right after upload (off the request path) and
+by `manage.py generate_derivatives` for backfills. Serializers only
+advertise a derivative once its file exists, falling back to the original.
+"""
+import logging
+import multiprocessing
+import os
+import posixpath
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# name -> longest side in pixels (never upscaled)
+DERIVATIVES = {'thumb': 400, 'large': 1600}
+WEBP_QUALITY = 80
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+
+
+def derivative_url(url, name):
+    """Where the `name` derivative of the image at `url` lives, or None for non-images"""
+    if not url:
+        return None
+    stem, extension = posixpath.splitext(url)
+    if extension.lower() not in IMAGE_EXTENSIONS:
+        return None
+    return f'{stem}.{name}.webp'
+
+
+def media_path(url):
+    """Filesystem path of a local /media/ URL, or None for anything else"""
+    if not url or not url.startswith(settings.MEDIA_URL) or '..' in url:
+        return None
+    return os.path.join(settings.MEDIA_ROOT, *url[len(settings.MEDIA_URL):].split('/'))
+
+
+def generate_derivatives(path, derivatives=None, quality=WEBP_QUALITY):
+    """
+    Write every missing derivative of the image at `path` and return how many
+    were created. Runs in worker processes, so it must not touch Django.
+    """
+    from PIL import Image, ImageOps
+
+    derivatives = derivatives or DERIVATIVES
+    stem = os.path.splitext(path)[0]
+    targets = {
+        name: f'{stem}.{name}.webp' for name in derivatives
+        if not os.path.exists(f'{stem}.{name}.webp')
+    }
+    if not targets:
+        return 0
+    with Image.open(path) as original:
+        original.seek(0)  # first frame of animations
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        # Largest first, each resized from the previous one: cheaper than resizing the original twice
+        for name in sorted(targets, key=derivatives.get, reverse=True):
+            size = derivatives[name]
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.webp', delete=False) as temp:
+                try:
+                    image.save(temp, 'WEBP', quality=quality, method=4)
+                except BaseException:
+                    os.unlink(temp.name)
+                    raise
+            os.chmod(temp.name, 0o644)
+            os.replace(temp.name, targets[name])
+    return len(targets)
+
+
+def safe_generate_derivatives(path):
+    """generate_derivatives for pool workers: logs and swallows failures such as corrupt uploads"""
+    try:
+        return generate_derivatives(path)
+    except Exception:
+        logger.exception('Could not generate derivatives for %s', path)
+        return 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the web process runs threads (e.g. the media writer pool)
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.MEDIA_DERIVATIVE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _discard_pool():
+    """Drop a broken pool (e.g. a worker was killed) so the next upload starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def schedule_derivatives(urls):
+    """Queue derivative generation for freshly uploaded images without waiting for it"""
+    if settings.MEDIA_DERIVATIVE_WORKERS <= 0:
+        return  # left to `manage.py generate_derivatives`
+    for url in urls:
+        path = media_path(url)
+        if path and derivative_url(url, 'thumb'):
+            try:
+                _get_pool().submit(safe_generate_derivatives, path)
+            except Exception:
+                # Never fail an upload over thumbnails; the worker command backfills them
+                logger.exception('Could not schedule derivatives for %s', path)
+                _discard_pool()
+
+
+# Derivatives are never deleted while their original exists, so a positive
+# lookup is remembered for the life of the process. A negative one is only
+# trusted for _MISSING_TTL seconds: long enough that pages full of images that
+# are still waiting for (or failed) generation don't stat every file on every
+# serialization, short enough that fresh thumbnails show up soon after upload.
+# Least recently used entries are evicted one at a time past the limit.
+_available = OrderedDict()  # target url -> None if present, else monotonic expiry of the miss
+_available_lock = threading.Lock()
+_AVAILABLE_LIMIT = 100_000
+_MISSING_TTL = 30
+
+
+def available_derivative_url(url, name):
+    """URL of the derivative if it has been generated, else None"""
+    target = derivative_url(url, name)
+    if target is None:
+        return None
+    now = time.monotonic()
+    with _available_lock:
+        if target in _available:
+            expires = _available[target]
+            if expires is None or expires > now:
+                _available.move_to_end(target)
+                return target if expires is None else None
+    path = media_path(target)
+    exists = path is not None and os.path.exists(path)
+    with _available_lock:
+        _available[target] = None if exists else now + _MISSING_TTL
+        _available.move_to_end(target)
+        while len(_available) > _AVAILABLE_LIMIT:
+            _available.popitem(last=False)
+    return target if exists else None
+
+
+def thumbnail_url(url):
+    """Thumbnail for card-sized images, or the original until the thumbnail exists"""
+    return available_derivative_url(url, 'thumb') or url
@@ -0,0 +1,112 @@
+import copy
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .cache import cached_categories
+
+# Upper bounds (KES) of the price buckets; the last bucket is open-ended
+PRICE_BUCKET_BOUNDS = [Decimal(bound) for bound in ('1000', '5000', '20000', '100000')]
+
+
+def price_bucket_expression():
+    return Case(
+        *[
+            When(price__lt=bound, then=Value(index))
+            for index, bound in enumerate(PRICE_BUCKET_BOUNDS)
+        ],
+        default=Value(len(PRICE_BUCKET_BOUNDS)),
+        output_field=IntegerField(),
+    )
+
+
+def price_bucket_ranges():
+    lower = [None] + PRICE_BUCKET_BOUNDS
+    upper = PRICE_BUCKET_BOUNDS + [None]
+    return list(zip(lower, upper))
+
+
+def compute_facets(queryset, include_status=False, category=None):
+    """
+    Category, price-bucket and (optionally) status counts for a filtered
+    product queryset, from one GROUP BY over (category, bucket, status).
+
+    With `category`, the queryset must not be filtered on category: the
+    category facet then counts every category (what the results would be if
+    the client picked another one) while the other facets only count the
+    selected category.
+    """
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression())
+        .values_list('category_id', 'price_bucket', 'status')
+        .annotate(total=Count('pk'))
+    )
+    by_category, by_bucket, by_status = defaultdict(int), defaultdict(int), defaultdict(int)
+    for category_id, bucket, product_status, total in rows:
+        by_category[category_id] += total
+        if category is None or category_id == category:
+            by_bucket[bucket] += total
+            by_status[product_status] += total
+
+    names = {category.id: category.name for category in cached_categories()}
+    facets = {
+        'categories': sorted(
+            (
+                {'id': category_id, 'name': names.get(category_id), 'count': total}
+                for category_id, total in by_category.items()
+                if category_id is not None
+            ),
+            key=lambda item: (-item['count'], item['name'] or ''),
+        ),
+        'price': [
+            {
+                'min': str(low) if low is not None else None,
+                'max': str(high) if high is not None else None,
+                'count': by_bucket.get(index, 0),
+            }
+            for index, (low, high) in enumerate(price_bucket_ranges())
+        ],
+    }
+    if include_status:
+        facets['status'] = dict(by_status)
+    return facets
+
+
+class FacetedListMixin:
+    """
+    Add facet counts to a paginated product list when the client asks with ?facets=1.
+    The category facet ignores the `category` filter itself, so it keeps listing the
+    other categories instead of collapsing to the selected one.
+    """
+    facets_query_param = 'facets'
+    category_query_param = 'category'
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        wants_facets = request.query_params.get(self.facets_query_param, '').lower() in ('1', 'true')
+        if wants_facets and isinstance(response.data, dict):
+            include_status = getattr(request.user, 'is_admin', False)
+            try:
+                category = int(request.query_params[self.category_query_param])
+            except (KeyError, ValueError):
+                queryset, category = self.filter_queryset(self.get_queryset()), None
+            else:
+                queryset = self.get_facet_queryset()
+            response.data['facets'] = compute_facets(queryset, include_status=include_status, category=category)
+        return response
+
+    def get_facet_queryset(self):
+        """The list's queryset with every filter applied except the category"""
+        request = self.request
+        params = request.query_params.copy()
+        params.pop(self.category_query_param, None)
+        facet_request = copy.copy(request)
+        facet_request._request = copy.copy(request._request)
+        facet_request._request.GET = params
+        self.request = facet_request
+        try:
+            return self.filter_queryset(self.get_queryset())
+        finally:
+            self.request = request
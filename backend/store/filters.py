@@ -0,0 +1,88 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from django_filters import rest_framework as django_filters
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import Product
+
+SEARCH_CONFIG = 'english'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_query(text):
+    """
+    Turn free text into a prefix-aware tsquery.
+    Every word must match and the last one is treated as a prefix,
+    so partially typed words in the search box still find results.
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    tokens[-1] = f'{tokens[-1]}:*'
+    return SearchQuery(' & '.join(tokens), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_products(queryset, text, order_by_rank=True):
+    """Filter products through the GIN-indexed search vector, ranked by relevance"""
+    query = build_search_query(text)
+    if query is None:
+        return queryset
+    # ts_rank returns real; cast so the value survives a round trip through a cursor
+    queryset = queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
+    if order_by_rank:
+        queryset = queryset.order_by('-search_rank', '-date_posted', 'pk')
+    return queryset
+
+
+class ProductFullTextSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on product views.
+    Uses Product.search_vector (name weighted above description) instead of
+    ILIKE scans. Results are ordered by rank unless the client asked for an
+    explicit ordering, so this backend must come after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').replace('\x00', '')
+        explicit_ordering = bool(request.query_params.get(api_settings.ORDERING_PARAM))
+        return search_products(queryset, text, order_by_rank=not explicit_ordering)
+
+
+class ProductPriceRangeFilter(django_filters.FilterSet):
+    """
+    ?min_price= / ?max_price= (inclusive).
+    Filters are declared without Meta.model so the same filterset applies to
+    Product and ProductListing querysets.
+    """
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+
+
+class ProductFilter(ProductPriceRangeFilter):
+    """Catalog filters for ProductListView"""
+    category = django_filters.NumberFilter(field_name='category')
+    status = django_filters.ChoiceFilter(choices=Product.Status.choices)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that appends the pk, in the direction of the first term,
+    so ties (equal prices or names) have a stable order that matches the
+    (status, price|name, id) indexes and the keyset cursor.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return ordering
@@ -0,0 +1,105 @@
+"""
+Carts for shoppers who have not logged in.
+
+A guest cart lives only in the cache, as {product id: quantity} under an
+opaque random token that the client keeps and sends back in the
+X-Cart-Token header, so browsing never writes to the database. Carts expire
+GUEST_CART_TIMEOUT seconds after their last change. Logging in with the
+token merges the cart into the user's Cart with one upsert.
+
+Changes are read-modify-write on one cache entry: two tabs changing the
+same guest cart at the same instant keep the last write.
+"""
+import re
+import secrets
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .carts import apply_cart_operations, fold_cart_operations
+from .models import ProductListing
+
+TOKEN_RE = re.compile(r'^[\w-]{32}$')
+MAX_GUEST_CART_ITEMS = 100
+
+
+class GuestCartFull(ValueError):
+    pass
+
+
+def _key(token):
+    return f'guest-cart:{token}'
+
+
+def new_token():
+    return secrets.token_urlsafe(24)
+
+
+def load_guest_cart(token):
+    """{product id: quantity}; empty for unknown, expired or malformed tokens"""
+    if not token or not TOKEN_RE.match(token):
+        return {}
+    return cache.get(_key(token)) or {}
+
+
+def clear_guest_cart(token):
+    if token and TOKEN_RE.match(token):
+        cache.delete(_key(token))
+
+
+def apply_guest_operations(token, operations):
+    """
+    Apply validated cart operations (see CartBatchSerializer) to a guest cart.
+    Returns (token, items); a token is issued when the given one has no cart,
+    so tokens are always ours.
+    """
+    items = load_guest_cart(token)
+    if not items:
+        token = new_token()
+    for product_id, (mode, quantity) in fold_cart_operations(operations).items():
+        key = str(product_id)
+        if mode == 'add':
+            quantity += items.get(key, 0)
+        if quantity > 0:
+            items[key] = quantity
+        else:
+            items.pop(key, None)
+    if len(items) > MAX_GUEST_CART_ITEMS:
+        raise GuestCartFull(f'A guest cart holds at most {MAX_GUEST_CART_ITEMS} products')
+    if items:
+        cache.set(_key(token), items, settings.GUEST_CART_TIMEOUT)
+    else:
+        cache.delete(_key(token))
+    return token, items
+
+
+def guest_cart_summary(token, items):
+    """
+    The cart as GuestCartSerializer renders it, with products read from the
+    listing read model in one query. Products no longer approved are left out.
+    """
+    listings = ProductListing.objects.in_bulk([uuid.UUID(pk) for pk in items]) if items else {}
+    lines = []
+    for pk, quantity in items.items():
+        listing = listings.get(uuid.UUID(pk))
+        if listing is not None:
+            lines.append({'product': listing, 'quantity': quantity, 'subtotal': listing.price * quantity})
+    return {
+        'cart_token': token if items else None,
+        'items': lines,
+        'total': sum((line['subtotal'] for line in lines), 0),
+        'items_count': len(lines),
+    }
+
+
+def merge_guest_cart(user, token):
+    """Add a guest cart's items to the user's cart with one upsert and drop the guest cart"""
+    items = load_guest_cart(token)
+    if not items:
+        return 0
+    apply_cart_operations(user, [
+        {'op': 'add', 'product_id': uuid.UUID(pk), 'quantity': quantity} for pk, quantity in items.items()
+    ])
+    clear_guest_cart(token)
+    return len(items)
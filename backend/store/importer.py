@@ -0,0 +1,228 @@
+"""
+Streaming bulk import of products from CSV or JSON Lines.
+
+Rows are read lazily and validated and written one chunk at a time, so
+memory stays flat however large the file is. Invalid rows are reported with
+their line number and skipped; the rest of the file is still imported.
+"""
+import csv
+import io
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import DecimalValidator
+from django.db import DatabaseError, connection, connections, transaction
+from django.utils import timezone
+
+from .cache import cached_categories
+from .models import Product
+
+FORMATS = ('csv', 'jsonl')
+
+# CSV cells cannot hold lists; images and videos are separated by this character
+LIST_SEPARATOR = '|'
+
+
+class RowError(Exception):
+    pass
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or RowError) for every record in `stream`"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, RowError(f'invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError('expected a JSON object')
+            continue
+        yield line_number, row
+
+
+def _media_list(value, column):
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    raise RowError(f'{column}: expected a list of URLs')
+
+
+class ProductRowBuilder:
+    """
+    Turns raw rows into Product column tuples (COPY_COLUMNS order), applying
+    the same rules as ProductCreateSerializer. Categories are resolved by
+    name from one lookup made up front.
+    """
+
+    def __init__(self, owner, status):
+        self.owner_id = owner.pk
+        self.status = status
+        self.category_ids = {category.name.casefold(): category.id for category in cached_categories()}
+        price_field = Product._meta.get_field('price')
+        self.validate_price = DecimalValidator(price_field.max_digits, price_field.decimal_places)
+        self.name_length = Product._meta.get_field('name').max_length
+
+    @staticmethod
+    def _text(row, column):
+        value = row.get(column)
+        return value.strip() if isinstance(value, str) else ''
+
+    def _price(self, row):
+        value = row.get('price')
+        try:
+            price = Decimal(value.strip() if isinstance(value, str) else str(value))
+            if not price.is_finite():
+                raise InvalidOperation
+            self.validate_price(price)
+        except (InvalidOperation, TypeError):
+            raise RowError(f'price: "{value}" is not a decimal number')
+        except ValidationError as exc:
+            raise RowError(f'price: {" ".join(exc.messages)}')
+        if price < 0:
+            raise RowError('price: must not be negative')
+        return price
+
+    def build(self, row):
+        name = self._text(row, 'name')
+        if not name:
+            raise RowError('name: this field is required')
+        if len(name) > self.name_length:
+            raise RowError(f'name: longer than {self.name_length} characters')
+        description = self._text(row, 'description')
+        if not description:
+            raise RowError('description: this field is required')
+        price = self._price(row)
+
+        category_id = None
+        category = str(row.get('category') or '').strip()
+        if category:
+            category_id = self.category_ids.get(category.casefold())
+            if category_id is None:
+                raise RowError(f'category: unknown category "{category}"')
+
+        images = _media_list(row.get('images'), 'images')
+        videos = _media_list(row.get('videos'), 'videos')
+        if not images and not videos:
+            raise RowError('at least one image or video is required')
+
+        now = timezone.now()
+        return (
+            uuid.uuid4(), name, description, price, category_id,
+            json.dumps(images), json.dumps(videos), self.status, now, now, self.owner_id,
+        )
+
+
+COPY_COLUMNS = (
+    'id', 'name', 'description', 'price', 'category_id',
+    'images', 'videos', 'status', 'date_posted', 'date_updated', 'owner_id',
+)
+
+
+def copy_products(rows):
+    """
+    Insert column tuples with COPY, which skips per-row statement parsing and
+    model instantiation. Database triggers (category counters, the listing
+    read model) still run once per COPY through their transition tables.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)  # None is written unquoted-empty, i.e. NULL
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {Product._meta.db_table} ({", ".join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
+
+
+def write_chunk(valid):
+    """
+    COPY one chunk of (line number, values) in its own transaction.
+    Returns (rows written, [(line number, error)]).
+    """
+    try:
+        with transaction.atomic():
+            copy_products([values for _, values in valid])
+        return len(valid), []
+    except DatabaseError:
+        pass
+    # Something slipped past validation; find the offending rows one by one
+    written, failures = 0, []
+    for line_number, values in valid:
+        try:
+            with transaction.atomic():
+                copy_products([values])
+            written += 1
+        except DatabaseError as exc:
+            failures.append((line_number, str(exc).strip().splitlines()[0]))
+    return written, failures
+
+
+class ProductImporter:
+    """
+    Validate and COPY rows `chunk_size` at a time, collecting per-row errors.
+
+    A single writer thread (with its own connection) runs the COPY for one
+    chunk while the caller parses and validates the next, so at most two
+    chunks are held in memory.
+    """
+
+    def __init__(self, builder, chunk_size=5000, on_error=None):
+        self.builder = builder
+        self.chunk_size = chunk_size
+        self.on_error = on_error or (lambda line_number, message: None)
+        self.imported = 0
+        self.failed = 0
+
+    def _fail(self, line_number, message):
+        self.failed += 1
+        self.on_error(line_number, message)
+
+    def _collect(self, pending):
+        written, failures = pending.result()
+        self.imported += written
+        for line_number, message in failures:
+            self._fail(line_number, message)
+
+    def run(self, rows):
+        rows = iter(rows)
+        pending = None
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            try:
+                while chunk := list(islice(rows, self.chunk_size)):
+                    valid = self._validate(chunk)
+                    if pending is not None:
+                        self._collect(pending)
+                        pending = None
+                    if valid:
+                        pending = writer.submit(write_chunk, valid)
+                if pending is not None:
+                    self._collect(pending)
+            finally:
+                writer.submit(connections.close_all)
+        return self.imported, self.failed
+
+    def _validate(self, chunk):
+        valid = []
+        for line_number, row in chunk:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                valid.append((line_number, self.builder.build(row)))
+            except RowError as exc:
+                self._fail(line_number, str(exc))
+        return valid
@@ -0,0 +1,32 @@
+from django.db import connection, transaction
+
+from .models import Category, Product, ProductListing, User
+
+LISTING_COLUMNS = (
+    'id, name, price, category_id, category_name, owner_id, owner_name, '
+    'primary_image, status, date_posted, search_vector'
+)
+
+REBUILD_PRODUCT_LISTING = f"""
+INSERT INTO {ProductListing._meta.db_table} ({LISTING_COLUMNS})
+SELECT p.id, p.name, p.price, p.category_id, c.name,
+       p.owner_id, btrim(u.first_name || ' ' || u.last_name),
+       p.images ->> 0, p.status, p.date_posted, p.search_vector
+FROM {Product._meta.db_table} AS p
+JOIN {User._meta.db_table} AS u ON u.id = p.owner_id
+LEFT JOIN {Category._meta.db_table} AS c ON c.id = p.category_id
+WHERE p.status = %s
+"""
+
+
+def rebuild_product_listing():
+    """
+    Repopulate the ProductListing read model from scratch.
+    The triggers keep it current; this is for repairs after restores or
+    manual SQL with triggers disabled. Returns the number of listed products.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {Product._meta.db_table} IN SHARE MODE')
+        cursor.execute(f'DELETE FROM {ProductListing._meta.db_table}')
+        cursor.execute(REBUILD_PRODUCT_LISTING, [Product.Status.APPROVED])
+        return cursor.rowcount
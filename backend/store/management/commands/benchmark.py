@@ -0,0 +1,45 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from store.benchmarks import SCENARIOS
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time hot store code paths against the configured database (all writes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS))
+        parser.add_argument('--rows', type=int, default=0, help='Rows to seed before timing')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--term', default='', help='Search term for search scenarios')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        cases = SCENARIOS[options['scenario']](options)
+        width = max(32, *(len(label) for label, _ in cases))
+        for label, func in cases:
+            func()  # warm up caches and plans
+            timings = []
+            for _ in range(options['iterations']):
+                start = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            self.stdout.write(
+                f'{label:<{width}} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms'
+            )
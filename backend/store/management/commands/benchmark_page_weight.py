@@ -0,0 +1,90 @@
+import io
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from store.benchmarks import seed_user
+from store.derivatives import generate_derivatives, media_path
+from store.media import product_media_storage
+from store.models import Product
+from store.serializers import ProductListSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+def synthetic_photo(width, height, seed):
+    """A JPEG that compresses roughly like a product photo: smooth gradients plus sensor noise"""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(seed)
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(width // 10, width // 3)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    image = image.filter(ImageFilter.GaussianBlur(8))
+    noise = Image.effect_noise((width, height), 24).convert('RGB')
+    image = Image.blend(image, noise, 0.12)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    buffer.seek(0)
+    buffer.name = f'photo-{seed}.jpg'
+    return buffer
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure image bytes a catalog page downloads with original uploads versus '
+        'generated thumbnails (uses a temporary MEDIA_ROOT; database writes are rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--width', type=int, default=3000)
+        parser.add_argument('--height', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            try:
+                with transaction.atomic():
+                    self._run(options)
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _run(self, options):
+        owner = seed_user('admin')
+        urls = [
+            product_media_storage.save(synthetic_photo(options['width'], options['height'], seed), 'images')
+            for seed in range(options['page_size'])
+        ]
+        Product.objects.bulk_create([
+            Product(name=f'Product {i}', description='Benchmark product', price=100, images=[url],
+                    owner=owner, status=Product.Status.APPROVED)
+            for i, url in enumerate(urls)
+        ])
+        products = Product.objects.filter(owner=owner).select_related('owner', 'category')
+
+        def page_bytes(field):
+            rows = ProductListSerializer(products, many=True).data
+            return sum(os.path.getsize(media_path(row[field])) for row in rows)
+
+        before = page_bytes('thumbnail')  # no derivatives yet: falls back to the originals
+        start = time.perf_counter()
+        for url in urls:
+            generate_derivatives(media_path(url))
+        per_image = (time.perf_counter() - start) * 1000 / len(urls)
+        after = page_bytes('thumbnail')
+
+        self.stdout.write(f'catalog page of {len(urls)} products')
+        self.stdout.write(f'  originals   {before / 1024:10.1f} KiB')
+        self.stdout.write(f'  thumbnails  {after / 1024:10.1f} KiB   ({after / before:.1%} of the original bytes)')
+        self.stdout.write(f'  derivative generation {per_image:.0f} ms per image (single process)')
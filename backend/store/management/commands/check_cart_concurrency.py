@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from store.benchmarks import seed_products, seed_user
+from store.models import Cart, CartItem, Product, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer POST /api/cart/add/ from many threads at once and fail unless every '
+        'increment landed. Writes are committed (threads use their own connections) '
+        'and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--adds', type=int, default=25, help='Adds per thread')
+        parser.add_argument('--products', type=int, default=3)
+
+    def handle(self, *args, **options):
+        threads, adds = options['threads'], options['adds']
+        owner = seed_user(User.Role.ADMIN)
+        customer = seed_user()
+        try:
+            seed_products(options['products'], owner=owner, categories=1)
+            products = list(Product.objects.filter(owner=owner).order_by('pk'))
+            start = threading.Barrier(threads)
+
+            def worker(n):
+                client = APIClient()
+                client.force_authenticate(customer)
+                failures = []
+                try:
+                    start.wait()
+                    for i in range(adds):
+                        # Every thread starts on the same (not yet existing) cart and item
+                        product = products[(n + i) % len(products)]
+                        quantity = 1 + (n + i) % 3
+                        response = client.post(
+                            '/api/cart/add/', {'product_id': str(product.pk), 'quantity': quantity}, format='json',
+                        )
+                        if response.status_code != 201:
+                            failures.append(f'{response.status_code} {response.data}')
+                        else:
+                            expected[n].append((product.pk, quantity))
+                finally:
+                    connection.close()
+                return failures
+
+            expected = [[] for _ in range(threads)]
+            with ThreadPoolExecutor(threads) as pool:
+                failures = [f for result in pool.map(worker, range(threads)) for f in result]
+            if failures:
+                raise CommandError(f'{len(failures)} adds failed, e.g. {failures[0]}')
+
+            want = {}
+            for product_id, quantity in (entry for entries in expected for entry in entries):
+                want[product_id] = want.get(product_id, 0) + quantity
+            cart = Cart.objects.get(user=customer)
+            got = dict(CartItem.objects.filter(cart=cart).values_list('product_id', 'quantity'))
+            prices = {product.pk: product.price for product in products}
+            subtotal = sum(prices[pk] * quantity for pk, quantity in want.items())
+
+            self.stdout.write(f'{threads} threads x {adds} adds over {len(products)} products')
+            for product in products:
+                self.stdout.write(f'  {product.name[:30]:<30} expected {want.get(product.pk, 0):>5}   got {got.get(product.pk, 0):>5}')
+            if got != want:
+                raise CommandError('Lost or duplicated cart increments')
+            if (cart.item_count, cart.subtotal) != (len(want), subtotal):
+                raise CommandError(
+                    f'Cart totals {cart.item_count} items / {cart.subtotal} do not match {len(want)} / {subtotal}'
+                )
+            self.stdout.write(self.style.SUCCESS('Every concurrent add landed exactly once'))
+        finally:
+            Product.objects.filter(owner=owner).delete()
+            customer.delete()
+            owner.delete()
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import Http404
+from django.test import RequestFactory, override_settings
+
+from store.serving import serve_media
+
+BODY = bytes(range(256)) * 4  # 1024 bytes, every byte distinguishable
+CONTENT_ADDRESSED = 'products/images/{0}/{1}/{0}{1}{2}.jpg'
+MUTABLE = 'products/images/legacy.jpg'
+
+
+def _content(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = (
+        'Assert the headers and status codes of /media/ responses (ranges, conditional '
+        'GET, caching, hidden paths, proxy offload) against files in a temporary MEDIA_ROOT'
+    )
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp(prefix='media-check-')
+        digest = hashlib.sha256(BODY).hexdigest()
+        immutable = CONTENT_ADDRESSED.format(digest[:2], digest[2:4], digest[4:])
+        try:
+            for path in (immutable, MUTABLE, 'products/.incoming/upload.part'):
+                os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+                with open(os.path.join(root, path), 'wb') as f:
+                    f.write(BODY)
+            with override_settings(MEDIA_ROOT=root):
+                self.failures = []
+                with override_settings(MEDIA_SERVE_MODE='django'):
+                    self._check_django(immutable)
+                for mode, header in (('x-accel-redirect', 'X-Accel-Redirect'), ('x-sendfile', 'X-Sendfile')):
+                    with override_settings(MEDIA_SERVE_MODE=mode):
+                        self._check_offload(mode, header, immutable)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        if self.failures:
+            raise CommandError('Media serving check failed:\n  ' + '\n  '.join(self.failures))
+        self.stdout.write(self.style.SUCCESS('Media responses carry the expected headers'))
+
+    def expect(self, label, condition, detail=''):
+        self.stdout.write(f"{'ok  ' if condition else 'FAIL'} {label}")
+        if not condition:
+            self.failures.append(f'{label}: {detail}')
+
+    def get(self, path, **headers):
+        request = RequestFactory().get(f'/media/{path}', headers=headers)
+        try:
+            return serve_media(request, path)
+        except Http404:
+            return None
+
+    def _check_django(self, immutable):
+        size = len(BODY)
+        response = self.get(immutable)
+        self.expect(
+            'full response', response.status_code == 200 and response['Accept-Ranges'] == 'bytes'
+            and _content(response) == BODY, response.status_code,
+        )
+        etag = response['ETag']
+
+        for header, start, end in (('bytes=0-9', 0, 9), ('bytes=-10', size - 10, size - 1), ('bytes=10-', 10, size - 1)):
+            response = self.get(immutable, Range=header)
+            self.expect(
+                f'range {header}',
+                response.status_code == 206
+                and response['Content-Range'] == f'bytes {start}-{end}/{size}'
+                and response['Content-Length'] == str(end - start + 1)
+                and _content(response) == BODY[start:end + 1],
+                f"{response.status_code} {response.get('Content-Range')} {response.get('Content-Length')}",
+            )
+
+        response = self.get(immutable, Range=f'bytes={size}-')
+        self.expect(
+            'range past end of file', response.status_code == 416 and response['Content-Range'] == f'bytes */{size}',
+            f"{response.status_code} {response.get('Content-Range')}",
+        )
+        response = self.get(immutable, Range='bytes=0-9', If_Range='"stale"')
+        self.expect('If-Range mismatch sends the whole file', response.status_code == 200, response.status_code)
+        response = self.get(immutable, Range='bytes=0-9', If_Range=etag)
+        self.expect('If-Range match sends the range', response.status_code == 206, response.status_code)
+        response = self.get(immutable, If_None_Match=etag)
+        self.expect('If-None-Match revalidates', response.status_code == 304, response.status_code)
+
+        cache_control = self.get(immutable)['Cache-Control']
+        self.expect('content-addressed files are immutable', 'immutable' in cache_control, cache_control)
+        cache_control = self.get(MUTABLE)['Cache-Control']
+        self.expect('other files are not immutable', 'immutable' not in cache_control, cache_control)
+
+        self.expect('staged uploads are hidden', self.get('products/.incoming/upload.part') is None)
+        self.expect('path traversal is refused', self.get('../media-check-secret') is None)
+        self.expect('traversal inside a path is refused', self.get('products/../../etc/passwd') is None)
+
+    def _check_offload(self, mode, header, immutable):
+        other = 'X-Sendfile' if header == 'X-Accel-Redirect' else 'X-Accel-Redirect'
+        for label, headers in (('full', {}), ('range', {'Range': 'bytes=0-9'})):
+            response = self.get(immutable, **headers)
+            self.expect(
+                f'{mode}: {label} request handed to the proxy',
+                response.status_code == 200 and header in response and other not in response
+                and 'Content-Type' not in response and 'Content-Range' not in response
+                and response.content == b'',
+                f'{response.status_code} {dict(response.items())}',
+            )
+        self.expect(f'{mode}: hidden paths stay hidden', self.get('products/.incoming/upload.part') is None)
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from store import views
+from store.benchmarks import seed_store
+from store.cache import category_cache
+from store.querybudget import get_query_budget, record_queries
+
+# (label, url name, view class, who is asking, query string)
+CHECKS = [
+    ('products', 'product-list', views.ProductListView, None, ''),
+    ('product search', 'product-search', views.ProductSearchView, None, '?search=leather'),
+    ('product changes', 'product-changes', views.ProductChangesView, None, '?since=0'),
+    ('categories', 'category-list', views.CategoryListView, None, ''),
+    ('my products', 'my-products', views.MyProductsView, 'customer', ''),
+    ('pending products', 'pending-products', views.PendingProductsView, 'admin', ''),
+    ('cart', 'cart', views.CartView, 'customer', ''),
+    ('orders', 'order-list', views.OrderListView, 'customer', ''),
+    ('payments', 'payment-list', views.PaymentListView, 'customer', ''),
+    ('users', 'user-list', views.UserListView, 'admin', ''),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed the store at several volumes and fail if any endpoint exceeds its '
+        'query_budget or issues more queries as the data grows (all writes are rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000])
+
+    def handle(self, *args, **options):
+        counts = {}
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    counts[size] = self._measure(size)
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        failures = []
+        for label, _, view_class, _, _ in CHECKS:
+            budget = get_query_budget(view_class)
+            measured = [counts[size][label] for size in options['sizes']]
+            line = f'{label:<18} budget {budget!s:>4}   ' + '   '.join(
+                f'{size} rows: {count}' for size, count in zip(options['sizes'], measured)
+            )
+            if budget is not None and max(measured) > budget:
+                failures.append(f'{label}: {max(measured)} queries exceeds budget of {budget}')
+            elif len(set(measured)) > 1:
+                failures.append(f'{label}: query count grows with data ({measured})')
+            self.stdout.write(line)
+
+        if failures:
+            raise CommandError('Query budget check failed:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within their query budgets'))
+
+    def _measure(self, size):
+        users = seed_store(size)
+        category_cache.bump()
+        results = {}
+        for label, url_name, _, who, query in CHECKS:
+            client = APIClient()
+            if who:
+                client.force_authenticate(users[who])
+            with record_queries() as recorder:
+                response = client.get(reverse(url_name) + query)
+            if response.status_code != 200:
+                raise CommandError(f'{label}: GET returned {response.status_code}')
+            results[label] = recorder.count
+        return results
@@ -0,0 +1,104 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from store.benchmarks import seed_marketplace
+from store.changes import changes_after
+from store.models import CartItem, Order, Payment, Product, ProductChange, ProductListing, ProductMedia
+
+INDEX_NODES = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def hot_queries(sample):
+    """(label, queryset, expected index name or None for any index) for each hot query"""
+    user, category = sample['user'], sample['category']
+    approved = Product.objects.filter(status=Product.Status.APPROVED)
+    payment = Payment.objects.filter(user=user).first() or Payment.objects.first()
+    # A cursor deep into the cheapest-first listing, as the keyset paginator builds it
+    middle = approved.order_by('price', 'pk')[approved.count() // 2]
+    deep_page = approved.filter(
+        Q(price__gte=middle.price) & (Q(price__gt=middle.price) | Q(price=middle.price, pk__gt=middle.pk))
+    )
+    listing = ProductListing.objects.all()
+    page_ids = list(approved.order_by('-date_posted', '-pk').values_list('pk', flat=True)[:24])
+    primary_media = ProductMedia.objects.filter(kind=ProductMedia.Kind.IMAGE, position=0, product__in=page_ids)
+    change_log = ProductChange.objects.order_by('txid', 'id')
+    since = change_log[change_log.count() // 2]
+    return [
+        ('listing catalog page', listing.order_by('-date_posted', '-pk')[:10], 'listing_recent'),
+        ('listing by category', listing.filter(category=category).order_by('-date_posted')[:10], 'listing_category_recent'),
+        ('listing cheapest first', listing.filter(price__gte=10).order_by('price', 'pk')[:10], 'listing_price'),
+        ('listing by name', listing.order_by('name', 'pk')[:10], 'listing_name'),
+        ('approved catalog page', approved.order_by('-date_posted', '-pk')[:10], 'product_approved_recent'),
+        ('products by owner', Product.objects.filter(owner=user).order_by('-date_posted')[:10], 'product_owner_recent'),
+        ('products by category', approved.filter(category=category).order_by('-date_posted')[:10], 'product_category_status'),
+        ('cheapest first', approved.filter(price__gte=10).order_by('price', 'pk')[:10], 'product_status_price'),
+        ('cheapest first, deep cursor', deep_page.order_by('price', 'pk')[:10], 'product_status_price'),
+        ('by name', approved.order_by('name', 'pk')[:10], 'product_status_name'),
+        ('primary images for a page', primary_media.order_by().only('id', 'product_id', 'url'), 'product_media_primary'),
+        ('change feed page', changes_after(since.txid, since.id).order_by('txid', 'id')[:500], 'product_change_cursor'),
+        ('orders by customer', Order.objects.filter(customer=user).order_by('-created_at')[:10], 'order_customer_recent'),
+        ('payments by user', Payment.objects.filter(user=user).order_by('-created_at')[:10], 'payment_user_recent'),
+        ('cart items by user', CartItem.objects.filter(cart__user=user), None),
+        ('payment by transaction id', Payment.objects.filter(transaction_id=payment.transaction_id)[:1], None),
+    ]
+
+
+def index_scans(plan):
+    """(node type, relation, index name) for every index access in a JSON plan"""
+    found = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if node.get('Node Type') in INDEX_NODES:
+            found.append((node['Node Type'], node.get('Relation Name'), node.get('Index Name')))
+        stack.extend(node.get('Plans', []))
+    return found
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a realistic store and EXPLAIN every hot query, failing if one no '
+        'longer uses its index (all writes are rolled back)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--verbose-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                failures = self._check(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+        if failures:
+            raise CommandError('Query plan check failed:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All hot queries use their indexes'))
+
+    def _check(self, options):
+        sample = seed_marketplace(options['rows'])
+        with connection.cursor() as cursor:
+            for model in (Product, ProductListing, ProductMedia, ProductChange, Order, Payment, CartItem):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        failures = []
+        for label, queryset, expected in hot_queries(sample):
+            plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+            scans = index_scans(plan)
+            used = [name for _, _, name in scans]
+            ok = bool(scans) and (expected is None or expected in used)
+            self.stdout.write(f"{'ok  ' if ok else 'FAIL'} {label:<28} {', '.join(used) or plan['Node Type']}")
+            if options['verbose_plans']:
+                self.stdout.write(queryset.explain())
+            if not ok:
+                failures.append(f"{label}: expected {expected or 'an index scan'}, plan used {used or plan['Node Type']}")
+        return failures
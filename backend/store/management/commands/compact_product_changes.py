@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from store.changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Remove change feed entries superseded by a later change to the same product'
+
+    def handle(self, *args, **options):
+        removed = compact_changes()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} superseded product changes'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from store.product_media import describe_media, undescribed_media
+
+
+class Command(BaseCommand):
+    help = 'Fill in file size and image dimensions of product media rows that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        described = checked = 0
+        last_pk = 0
+        while True:
+            batch = list(undescribed_media().filter(pk__gt=last_pk).order_by('pk')[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            checked += len(batch)
+            described += describe_media(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} media files, described {described} (the rest are missing on disk)'
+        ))
@@ -0,0 +1,28 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from store.derivatives import derivative_url, media_path, safe_generate_derivatives
+from store.models import ProductMedia
+
+
+class Command(BaseCommand):
+    help = 'Generate missing WebP thumbnails and variants for every product image, in parallel processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        paths = []
+        urls = ProductMedia.objects.filter(kind=ProductMedia.Kind.IMAGE).values_list('url', flat=True)
+        for url in urls.order_by().distinct().iterator(chunk_size=2000):
+            path = media_path(url)
+            if path and derivative_url(url, 'thumb') and os.path.exists(path):
+                paths.append(path)
+
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            created = sum(pool.map(safe_generate_derivatives, paths, chunksize=8))
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {len(paths)} images, generated {created} derivatives'
+        ))
@@ -0,0 +1,69 @@
+import csv
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from store.importer import FORMATS, ProductImporter, ProductRowBuilder, read_rows
+from store.models import Product
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import products from a CSV or JSON Lines file (columns: name, description, '
+        'price, category, images, videos). Invalid rows are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--owner', required=True, help='Username or email of the seller')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument(
+            '--status', choices=Product.Status.values,
+            help="Defaults to approved for admin owners and pending otherwise, as in the API",
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per COPY')
+        parser.add_argument('--errors', help='Write rejected rows (line, error) to this CSV file')
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(Q(username=options['owner']) | Q(email=options['owner'])).first()
+        if owner is None:
+            raise CommandError(f'No user "{options["owner"]}"')
+        status = options['status'] or (Product.Status.APPROVED if owner.is_admin else Product.Status.PENDING)
+
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        error_file = open(options['errors'], 'w', newline='') if options['errors'] else None
+        if error_file:
+            error_writer = csv.writer(error_file)
+            error_writer.writerow(['line', 'error'])
+            on_error = lambda line_number, message: error_writer.writerow([line_number, message])
+        else:
+            on_error = lambda line_number, message: self.stderr.write(f'line {line_number}: {message}')
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        importer = ProductImporter(
+            ProductRowBuilder(owner, status), chunk_size=options['chunk_size'], on_error=on_error,
+        )
+        start = time.perf_counter()
+        try:
+            imported, failed = importer.run(read_rows(stream, fmt))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if error_file:
+                error_file.close()
+        elapsed = time.perf_counter() - start
+
+        rate = (imported + failed) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} products as {status}, rejected {failed} rows '
+            f'in {elapsed:.2f}s ({rate:,.0f} rows/sec)'
+        ))
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from store.models import MediaUpload
+from store.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = 'Discard resumable uploads that were started but not completed, and their staging files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=None,
+            help='Idle time before an upload is abandoned (default MEDIA_UPLOAD_EXPIRY_HOURS)',
+        )
+
+    def handle(self, *args, **options):
+        hours = options['hours'] if options['hours'] is not None else settings.MEDIA_UPLOAD_EXPIRY_HOURS
+        cutoff = timezone.now() - timedelta(hours=hours)
+        stale = MediaUpload.objects.filter(
+            status__in=[MediaUpload.Status.UPLOADING, MediaUpload.Status.COMPLETING], updated_at__lt=cutoff,
+        )
+        purged = 0
+        for upload in stale.iterator():
+            discard_upload(upload)
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(f'Discarded {purged} abandoned uploads'))
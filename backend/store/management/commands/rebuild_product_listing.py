@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from store.listing import rebuild_product_listing
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized ProductListing read model from the products table'
+
+    def handle(self, *args, **options):
+        listed = rebuild_product_listing()
+        self.stdout.write(self.style.SUCCESS(f'Product listing rebuilt ({listed} approved products)'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from store.counters import recompute_cart_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized item count and subtotal of every cart'
+
+    def handle(self, *args, **options):
+        fixed = recompute_cart_totals()
+        self.stdout.write(self.style.SUCCESS(f'Cart totals repaired ({fixed} carts corrected)'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from store.counters import recompute_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized per-category product counters'
+
+    def handle(self, *args, **options):
+        fixed = recompute_category_counts()
+        self.stdout.write(self.style.SUCCESS(f'Category counters repaired ({fixed} categories corrected)'))
@@ -0,0 +1,112 @@
+"""
+Content-addressed storage for product media.
+
+Uploads are streamed to a temporary file while being hashed, then renamed
+to a path derived from their SHA-256, so re-uploading identical bytes costs
+no extra disk and the URL of a file never changes meaning. Files are
+sharded two levels deep by hash prefix (65,536 directories) so no directory
+grows large. Legacy flat `/media/products/<folder>/<uuid>.<ext>` files are
+left where they are and keep resolving.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+HASH_ALGORITHM = 'sha256'
+
+
+class ContentAddressedStorage:
+
+    def __init__(self, prefix='products', root=None, base_url=None, max_workers=None):
+        self.prefix = prefix
+        self._root = root
+        self._base_url = base_url
+        self.max_workers = max_workers
+        self._known_dirs = set()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def root(self):
+        return os.path.join(self._root or settings.MEDIA_ROOT, self.prefix)
+
+    @property
+    def base_url(self):
+        return posixpath.join(self._base_url or settings.MEDIA_URL, self.prefix)
+
+    @staticmethod
+    def _extension(name):
+        return os.path.splitext(name or '')[1].lower()[:16]
+
+    @staticmethod
+    def relative_path(folder, digest, extension):
+        """`folder/ab/cd/abcd...ext` for a hex digest"""
+        return posixpath.join(folder, digest[:2], digest[2:4], digest + extension)
+
+    def path(self, relative_path):
+        return os.path.join(self.root, *relative_path.split('/'))
+
+    def url(self, relative_path):
+        return posixpath.join(self.base_url, relative_path)
+
+    def ensure_dir(self, directory):
+        if directory not in self._known_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._known_dirs.add(directory)
+
+    def save(self, file, folder):
+        """
+        Stream `file` (anything with .chunks() or .read()) into storage under
+        `folder` and return its URL. Identical content is stored once.
+        """
+        incoming = os.path.join(self.root, '.incoming')
+        self.ensure_dir(incoming)
+        digest = hashlib.new(HASH_ALGORITHM)
+        chunks = file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(64 * 1024), b'')
+        with tempfile.NamedTemporaryFile(dir=incoming, delete=False) as temp:
+            try:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    temp.write(chunk)
+            except BaseException:
+                os.unlink(temp.name)
+                raise
+
+        relative = self.relative_path(folder, digest.hexdigest(), self._extension(getattr(file, 'name', '')))
+        final = self.path(relative)
+        if os.path.exists(final):
+            os.unlink(temp.name)  # duplicate content
+        else:
+            self.ensure_dir(os.path.dirname(final))
+            os.chmod(temp.name, 0o644)
+            os.replace(temp.name, final)  # atomic; concurrent writers of the same bytes are harmless
+        return self.url(relative)
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers or settings.MEDIA_WRITE_WORKERS,
+                    thread_name_prefix='media-write',
+                )
+            return self._executor
+
+    def save_many(self, files):
+        """
+        Save (file, folder) pairs in parallel on the shared, bounded writer
+        pool and return their URLs in the same order. Hashing and file I/O
+        release the GIL, so uploads of several files overlap.
+        """
+        if len(files) <= 1:
+            return [self.save(file, folder) for file, folder in files]
+        futures = [self.executor.submit(self.save, file, folder) for file, folder in files]
+        return [future.result() for future in futures]
+
+
+product_media_storage = ContentAddressedStorage()
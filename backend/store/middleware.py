@@ -1,6 +1,12 @@
+import logging
+
 from django.middleware.csrf import get_token
 from django.utils.deprecation import MiddlewareMixin
 
+from .querybudget import get_query_budget, record_queries, resolve_view_class
+
+logger = logging.getLogger('store.queries')
+
 
 class CSRFExemptAPI(MiddlewareMixin):
     """
@@ -14,3 +20,37 @@ class CSRFExemptAPI(MiddlewareMixin):
         if request.path.startswith('/api/'):
             request.csrf_processing_done = True
         return None
+
+
+class QueryInspectionMiddleware:
+    """
+    Development aid: log suspected N+1 query patterns with the serializer
+    field that triggered them, and flag views that exceed their query_budget.
+    """
+    repeat_threshold = 3
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries(capture_source=True) as recorder:
+            response = self.get_response(request)
+
+        view_class = resolve_view_class(request)
+        view_name = view_class.__name__ if view_class else request.path
+
+        for shape, count, sources in recorder.repeated_shapes(self.repeat_threshold):
+            logger.warning(
+                'Possible N+1 in %s: %d identical queries from %s: %s',
+                view_name, count, ', '.join(sources) or 'view code', shape[:300],
+            )
+
+        budget = get_query_budget(view_class)
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                '%s %s ran %d queries, over its budget of %d',
+                request.method, view_name, recorder.count, budget,
+            )
+
+        response['X-Query-Count'] = str(recorder.count)
+        return response
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:01
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_product_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('status', 'approved')), fields=['name'], name='product_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
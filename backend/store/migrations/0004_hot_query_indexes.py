@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build indexes without blocking writes on large tables
+    atomic = False
+
+    dependencies = [
+        ('store', '0003_product_name_trigram'),
+    ]
+
+    operations = [
+        # New composite indexes first, then drop the single-column FK indexes they cover
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['customer', '-created_at'], name='order_customer_recent'),
+        ),
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at'], name='payment_user_recent'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['-date_posted', '-id'], name='product_approved_recent'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['owner', '-date_posted'], name='product_owner_recent'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['category', 'status', '-date_posted'], name='product_category_status'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='payments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='products', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:09
+
+from django.db import migrations, models
+
+
+def _apply_deltas(changes):
+    """Fold (category_id, status, n) rows into the category counters, skipping no-op deltas"""
+    return f"""
+        WITH delta AS (
+            SELECT category_id,
+                   coalesce(sum(n), 0) AS total,
+                   coalesce(sum(n) FILTER (WHERE status = 'approved'), 0) AS approved,
+                   coalesce(sum(n) FILTER (WHERE status = 'pending'), 0) AS pending
+            FROM ({changes}) AS changes
+            WHERE category_id IS NOT NULL
+            GROUP BY category_id
+        )
+        UPDATE store_category AS c
+        SET total_products_count = c.total_products_count + d.total,
+            approved_products_count = c.approved_products_count + d.approved,
+            pending_products_count = c.pending_products_count + d.pending
+        FROM delta AS d
+        WHERE c.id = d.category_id AND (d.total <> 0 OR d.approved <> 0 OR d.pending <> 0);
+    """
+
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION store_product_category_counts() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {_apply_deltas("SELECT category_id, status, 1 AS n FROM new_rows")}
+    ELSIF TG_OP = 'DELETE' THEN
+        {_apply_deltas("SELECT category_id, status, -1 AS n FROM old_rows")}
+    ELSE
+        {_apply_deltas(
+            "SELECT category_id, status, 1 AS n FROM new_rows "
+            "UNION ALL SELECT category_id, status, -1 AS n FROM old_rows"
+        )}
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_product_category_counts_insert
+    AFTER INSERT ON store_product REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_category_counts();
+CREATE TRIGGER store_product_category_counts_update
+    AFTER UPDATE ON store_product REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_category_counts();
+CREATE TRIGGER store_product_category_counts_delete
+    AFTER DELETE ON store_product REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_category_counts();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS store_product_category_counts_insert ON store_product;
+DROP TRIGGER IF EXISTS store_product_category_counts_update ON store_product;
+DROP TRIGGER IF EXISTS store_product_category_counts_delete ON store_product;
+DROP FUNCTION IF EXISTS store_product_category_counts();
+"""
+
+BACKFILL = """
+UPDATE store_category AS c
+SET total_products_count = s.total,
+    approved_products_count = s.approved,
+    pending_products_count = s.pending
+FROM (
+    SELECT category_id,
+           count(*) AS total,
+           count(*) FILTER (WHERE status = 'approved') AS approved,
+           count(*) FILTER (WHERE status = 'pending') AS pending
+    FROM store_product
+    WHERE category_id IS NOT NULL
+    GROUP BY category_id
+) AS s
+WHERE c.id = s.category_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='approved_products_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='pending_products_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='total_products_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        # Statement-level triggers with transition tables: bulk_create, queryset.update()
+        # and cascading deletes adjust each affected category once per statement.
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
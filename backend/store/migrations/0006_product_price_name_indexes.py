@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0005_category_product_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['status', 'price', 'id'], name='product_status_price'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['status', 'name', 'id'], name='product_status_name'),
+        ),
+    ]
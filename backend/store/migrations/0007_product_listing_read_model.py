@@ -0,0 +1,154 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:13
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+LISTING_COLUMNS = (
+    'id, name, price, category_id, category_name, owner_id, owner_name, '
+    'images, videos, primary_image, status, date_posted, search_vector'
+)
+
+
+def _listing_rows(products):
+    """SELECT producing listing rows for the approved products in `products`"""
+    return f"""
+        SELECT p.id, p.name, p.price, p.category_id, c.name,
+               p.owner_id, btrim(u.first_name || ' ' || u.last_name),
+               p.images, p.videos, p.images ->> 0, p.status, p.date_posted, p.search_vector
+        FROM {products} AS p
+        JOIN store_user AS u ON u.id = p.owner_id
+        LEFT JOIN store_category AS c ON c.id = p.category_id
+        WHERE p.status = 'approved'
+    """
+
+
+UPSERT_FROM_NEW_ROWS = f"""
+        INSERT INTO store_productlisting AS l ({LISTING_COLUMNS})
+        {_listing_rows('new_rows')}
+        ON CONFLICT (id) DO UPDATE
+        SET name = EXCLUDED.name, price = EXCLUDED.price,
+            category_id = EXCLUDED.category_id, category_name = EXCLUDED.category_name,
+            owner_id = EXCLUDED.owner_id, owner_name = EXCLUDED.owner_name,
+            images = EXCLUDED.images, videos = EXCLUDED.videos,
+            primary_image = EXCLUDED.primary_image, status = EXCLUDED.status,
+            date_posted = EXCLUDED.date_posted, search_vector = EXCLUDED.search_vector
+        WHERE (l.name, l.price, l.category_id, l.category_name, l.owner_id, l.owner_name,
+               l.images, l.videos, l.date_posted, l.search_vector)
+              IS DISTINCT FROM
+              (EXCLUDED.name, EXCLUDED.price, EXCLUDED.category_id, EXCLUDED.category_name,
+               EXCLUDED.owner_id, EXCLUDED.owner_name, EXCLUDED.images, EXCLUDED.videos,
+               EXCLUDED.date_posted, EXCLUDED.search_vector);
+"""
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION store_product_listing_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM store_productlisting AS l USING old_rows AS o WHERE l.id = o.id;
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM store_productlisting AS l USING new_rows AS n
+        WHERE l.id = n.id AND n.status <> 'approved';
+    END IF;
+    {UPSERT_FROM_NEW_ROWS}
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_product_listing_insert
+    AFTER INSERT ON store_product REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_listing_sync();
+CREATE TRIGGER store_product_listing_update
+    AFTER UPDATE ON store_product REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_listing_sync();
+CREATE TRIGGER store_product_listing_delete
+    AFTER DELETE ON store_product REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_listing_sync();
+
+CREATE FUNCTION store_user_listing_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE store_productlisting
+    SET owner_name = btrim(NEW.first_name || ' ' || NEW.last_name)
+    WHERE owner_id = NEW.id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_user_listing_name
+    AFTER UPDATE OF first_name, last_name ON store_user
+    FOR EACH ROW
+    WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+    EXECUTE FUNCTION store_user_listing_sync();
+
+CREATE FUNCTION store_category_listing_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE store_productlisting SET category_name = NEW.name WHERE category_id = NEW.id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_category_listing_name
+    AFTER UPDATE OF name ON store_category
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION store_category_listing_sync();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS store_product_listing_insert ON store_product;
+DROP TRIGGER IF EXISTS store_product_listing_update ON store_product;
+DROP TRIGGER IF EXISTS store_product_listing_delete ON store_product;
+DROP FUNCTION IF EXISTS store_product_listing_sync();
+DROP TRIGGER IF EXISTS store_user_listing_name ON store_user;
+DROP FUNCTION IF EXISTS store_user_listing_sync();
+DROP TRIGGER IF EXISTS store_category_listing_name ON store_category;
+DROP FUNCTION IF EXISTS store_category_listing_sync();
+"""
+
+BACKFILL = f"""
+INSERT INTO store_productlisting ({LISTING_COLUMNS})
+{_listing_rows('store_product')};
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_product_price_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('category_name', models.CharField(max_length=100, null=True)),
+                ('owner_name', models.CharField(blank=True, max_length=301)),
+                ('images', models.JSONField(default=list)),
+                ('videos', models.JSONField(default=list)),
+                ('primary_image', models.TextField(null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='approved', max_length=20)),
+                ('date_posted', models.DateTimeField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('category', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.category')),
+                ('owner', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date_posted'],
+                'indexes': [models.Index(fields=['-date_posted', '-id'], name='listing_recent'), models.Index(fields=['category', '-date_posted'], name='listing_category_recent'), models.Index(fields=['price', 'id'], name='listing_price'), models.Index(fields=['name', 'id'], name='listing_name'), django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='listing_search_vector_gin')],
+            },
+        ),
+        # Products are synced per statement through transition tables; owner
+        # and category renames touch only the listing rows that mention them.
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the queue index without blocking writes on store_product
+    atomic = False
+
+    dependencies = [
+        ('store', '0007_product_listing_read_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationClaim',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='moderation_claim', serialize=False, to='store.product')),
+                ('expires_at', models.DateTimeField()),
+                ('moderator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_claims', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['date_posted', 'id'], name='product_pending_queue'),
+        ),
+    ]
@@ -0,0 +1,175 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:05
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+read_model_0007 = import_module('store.migrations.0007_product_listing_read_model')
+
+
+def _media_entries(products):
+    """SELECT (product_id, kind, position, url) for every entry of the products' JSON media lists"""
+    return f"""
+        SELECT p.id AS product_id, m.kind, (m.ordinality - 1)::smallint AS position, m.url
+        FROM {products} AS p
+        CROSS JOIN LATERAL (
+            SELECT 'images' AS kind, e.value AS url, e.ordinality
+            FROM jsonb_array_elements_text(CASE jsonb_typeof(p.images) WHEN 'array' THEN p.images ELSE '[]' END)
+                 WITH ORDINALITY AS e(value, ordinality)
+            UNION ALL
+            SELECT 'videos', e.value, e.ordinality
+            FROM jsonb_array_elements_text(CASE jsonb_typeof(p.videos) WHEN 'array' THEN p.videos ELSE '[]' END)
+                 WITH ORDINALITY AS e(value, ordinality)
+        ) AS m
+    """
+
+
+def _insert_media(products):
+    # Content-addressed URLs (.../ab/cd/<sha256>.<ext>) carry their own hash.
+    # Slots that already hold the same URL keep their row and its metadata.
+    return f"""
+        INSERT INTO store_productmedia (product_id, kind, position, url, hash)
+        SELECT w.product_id, w.kind, w.position, w.url,
+               coalesce(substring(w.url from '/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})[^/]*$'), '')
+        FROM ({_media_entries(products)}) AS w
+        ON CONFLICT (product_id, kind, position) DO NOTHING;
+    """
+
+
+CHANGED_PRODUCTS = """(
+            SELECT n.id, n.images, n.videos
+            FROM new_rows AS n JOIN old_rows AS o ON o.id = n.id
+            WHERE (n.images, n.videos) IS DISTINCT FROM (o.images, o.videos)
+        )"""
+
+CREATE_MEDIA_TRIGGERS = f"""
+CREATE FUNCTION store_product_media_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {_insert_media('new_rows')}
+        RETURN NULL;
+    END IF;
+    -- Drop slots that no longer exist or now hold a different URL
+    DELETE FROM store_productmedia AS m
+    USING {CHANGED_PRODUCTS} AS c
+    WHERE m.product_id = c.id
+      AND m.url IS DISTINCT FROM (CASE m.kind WHEN 'images' THEN c.images ELSE c.videos END) ->> m.position::int;
+    {_insert_media(CHANGED_PRODUCTS)}
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_product_media_insert
+    AFTER INSERT ON store_product REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_media_sync();
+CREATE TRIGGER store_product_media_update
+    AFTER UPDATE ON store_product REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_media_sync();
+"""
+
+DROP_MEDIA_TRIGGERS = """
+DROP TRIGGER IF EXISTS store_product_media_insert ON store_product;
+DROP TRIGGER IF EXISTS store_product_media_update ON store_product;
+DROP FUNCTION IF EXISTS store_product_media_sync();
+"""
+
+BACKFILL_MEDIA = _insert_media('store_product')
+
+# The listing read model no longer copies the media lists; catalog pages only render primary_image
+LISTING_COLUMNS = (
+    'id, name, price, category_id, category_name, owner_id, owner_name, '
+    'primary_image, status, date_posted, search_vector'
+)
+
+UPSERT_LISTING_FROM_NEW_ROWS = f"""
+        INSERT INTO store_productlisting AS l ({LISTING_COLUMNS})
+        SELECT p.id, p.name, p.price, p.category_id, c.name,
+               p.owner_id, btrim(u.first_name || ' ' || u.last_name),
+               p.images ->> 0, p.status, p.date_posted, p.search_vector
+        FROM new_rows AS p
+        JOIN store_user AS u ON u.id = p.owner_id
+        LEFT JOIN store_category AS c ON c.id = p.category_id
+        WHERE p.status = 'approved'
+        ON CONFLICT (id) DO UPDATE
+        SET name = EXCLUDED.name, price = EXCLUDED.price,
+            category_id = EXCLUDED.category_id, category_name = EXCLUDED.category_name,
+            owner_id = EXCLUDED.owner_id, owner_name = EXCLUDED.owner_name,
+            primary_image = EXCLUDED.primary_image, status = EXCLUDED.status,
+            date_posted = EXCLUDED.date_posted, search_vector = EXCLUDED.search_vector
+        WHERE (l.name, l.price, l.category_id, l.category_name, l.owner_id, l.owner_name,
+               l.primary_image, l.date_posted, l.search_vector)
+              IS DISTINCT FROM
+              (EXCLUDED.name, EXCLUDED.price, EXCLUDED.category_id, EXCLUDED.category_name,
+               EXCLUDED.owner_id, EXCLUDED.owner_name, EXCLUDED.primary_image,
+               EXCLUDED.date_posted, EXCLUDED.search_vector);
+"""
+
+LISTING_SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION store_product_listing_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM store_productlisting AS l USING old_rows AS o WHERE l.id = o.id;
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM store_productlisting AS l USING new_rows AS n
+        WHERE l.id = n.id AND n.status <> 'approved';
+    END IF;
+    __UPSERT__
+    RETURN NULL;
+END;
+$$;
+"""
+
+RESTORE_LISTING_MEDIA = """
+UPDATE store_productlisting AS l SET images = p.images, videos = p.videos
+FROM store_product AS p WHERE p.id = l.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_media_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('images', 'Image'), ('videos', 'Video')], max_length=10)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('url', models.TextField()),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('bytes', models.BigIntegerField(blank=True, null=True)),
+                ('hash', models.CharField(blank=True, max_length=64)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='media', to='store.product')),
+            ],
+            options={
+                'ordering': ['product', 'kind', 'position'],
+                'indexes': [models.Index(condition=models.Q(('kind', 'images'), ('position', 0)), fields=['product'], include=('url',), name='product_media_primary'), models.Index(condition=models.Q(('hash', ''), _negated=True), fields=['hash'], name='product_media_hash')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'kind', 'position'), name='product_media_position')],
+            },
+        ),
+        # Synced per statement from the JSON lists, like the listing read model,
+        # so COPY imports and queryset.update() are covered too.
+        migrations.RunSQL(CREATE_MEDIA_TRIGGERS, DROP_MEDIA_TRIGGERS),
+        migrations.RunSQL(BACKFILL_MEDIA, migrations.RunSQL.noop),
+        migrations.RunSQL(
+            LISTING_SYNC_FUNCTION.replace('__UPSERT__', UPSERT_LISTING_FROM_NEW_ROWS),
+            LISTING_SYNC_FUNCTION.replace('__UPSERT__', read_model_0007.UPSERT_FROM_NEW_ROWS) + RESTORE_LISTING_MEDIA,
+        ),
+        migrations.RemoveField(
+            model_name='productlisting',
+            name='images',
+        ),
+        migrations.RemoveField(
+            model_name='productlisting',
+            name='videos',
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 6.0.2 on 2026-10-17 13:40
+
+from django.db import migrations, models
+
+CURRENT_TXID = 'pg_current_xact_id()::text::bigint'
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION store_product_change_log() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        -- Left the catalog: rejected or sent back to pending, or deleted outright
+        INSERT INTO store_productchange (product_id, status, txid, changed_at)
+        SELECT o.id, coalesce(p.status, 'deleted'), {CURRENT_TXID}, now()
+        FROM old_rows AS o LEFT JOIN store_product AS p ON p.id = o.id;
+    ELSE
+        INSERT INTO store_productchange (product_id, status, txid, changed_at)
+        SELECT n.id, 'approved', {CURRENT_TXID}, now() FROM new_rows AS n;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_listing_change_insert
+    AFTER INSERT ON store_productlisting REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_change_log();
+CREATE TRIGGER store_listing_change_update
+    AFTER UPDATE ON store_productlisting REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_change_log();
+CREATE TRIGGER store_listing_change_delete
+    AFTER DELETE ON store_productlisting REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_product_change_log();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS store_listing_change_insert ON store_productlisting;
+DROP TRIGGER IF EXISTS store_listing_change_update ON store_productlisting;
+DROP TRIGGER IF EXISTS store_listing_change_delete ON store_productlisting;
+DROP FUNCTION IF EXISTS store_product_change_log();
+"""
+
+# The current catalog as the feed's starting point, so a sync from the beginning is a full load
+BACKFILL = f"""
+INSERT INTO store_productchange (product_id, status, txid, changed_at)
+SELECT id, 'approved', {CURRENT_TXID}, now() FROM store_productlisting ORDER BY date_posted;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_product_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_id', models.UUIDField()),
+                ('status', models.CharField(choices=[('approved', 'Approved'), ('pending', 'Pending'), ('rejected', 'Rejected'), ('deleted', 'Deleted')], max_length=20)),
+                ('txid', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['txid', 'id'], name='product_change_cursor')],
+            },
+        ),
+        # Logged from the listing read model, whose triggers already fire exactly
+        # when something a catalog client renders changes (owner and category
+        # renames included); its IS DISTINCT FROM guard keeps no-op saves out.
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
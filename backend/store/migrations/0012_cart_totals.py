@@ -0,0 +1,116 @@
+# Generated by Django 6.0.2 on 2026-10-17 14:10
+
+from django.db import migrations, models
+
+
+def _recompute_carts(cart_ids):
+    """Recompute item_count/subtotal of the carts in `cart_ids` and bump their updated_at"""
+    # Locking the carts first (in id order) serializes concurrent writers to
+    # the same cart; the UPDATE then runs on a fresh snapshot that includes
+    # the items they committed.
+    return f"""
+        PERFORM 1 FROM store_cart WHERE id IN ({cart_ids}) ORDER BY id FOR UPDATE;
+        UPDATE store_cart AS c
+        SET item_count = t.item_count, subtotal = t.subtotal, updated_at = now()
+        FROM (
+            SELECT a.cart_id, count(i.id) AS item_count, coalesce(sum(i.quantity * p.price), 0) AS subtotal
+            FROM ({cart_ids}) AS a
+            LEFT JOIN store_cartitem AS i ON i.cart_id = a.cart_id
+            LEFT JOIN store_product AS p ON p.id = i.product_id
+            GROUP BY a.cart_id
+        ) AS t
+        WHERE c.id = t.cart_id;
+    """
+
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION store_cart_totals_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {_recompute_carts("SELECT DISTINCT cart_id FROM new_rows")}
+    ELSIF TG_OP = 'DELETE' THEN
+        {_recompute_carts("SELECT DISTINCT cart_id FROM old_rows")}
+    ELSE
+        {_recompute_carts("SELECT cart_id FROM new_rows UNION SELECT cart_id FROM old_rows")}
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_cart_totals_insert
+    AFTER INSERT ON store_cartitem REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_cart_totals_sync();
+CREATE TRIGGER store_cart_totals_update
+    AFTER UPDATE ON store_cartitem REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_cart_totals_sync();
+CREATE TRIGGER store_cart_totals_delete
+    AFTER DELETE ON store_cartitem REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_cart_totals_sync();
+
+-- Price changes reprice the carts holding the product; other edits a cart
+-- renders (name, status, category, images) only move their validators
+CREATE FUNCTION store_cart_product_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    {_recompute_carts('''
+            SELECT DISTINCT i.cart_id
+            FROM new_rows AS n
+            JOIN old_rows AS o ON o.id = n.id
+            JOIN store_cartitem AS i ON i.product_id = n.id
+            WHERE (n.price, n.name, n.status, n.category_id, n.images)
+                  IS DISTINCT FROM (o.price, o.name, o.status, o.category_id, o.images)
+        ''')}
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER store_cart_product_update
+    AFTER UPDATE ON store_product REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION store_cart_product_sync();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS store_cart_product_update ON store_product;
+DROP FUNCTION IF EXISTS store_cart_product_sync();
+DROP TRIGGER IF EXISTS store_cart_totals_insert ON store_cartitem;
+DROP TRIGGER IF EXISTS store_cart_totals_update ON store_cartitem;
+DROP TRIGGER IF EXISTS store_cart_totals_delete ON store_cartitem;
+DROP FUNCTION IF EXISTS store_cart_totals_sync();
+"""
+
+BACKFILL = """
+UPDATE store_cart AS c
+SET item_count = t.item_count, subtotal = t.subtotal
+FROM (
+    SELECT i.cart_id, count(*) AS item_count, sum(i.quantity * p.price) AS subtotal
+    FROM store_cartitem AS i
+    JOIN store_product AS p ON p.id = i.product_id
+    GROUP BY i.cart_id
+) AS t
+WHERE c.id = t.cart_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_product_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        # Recomputed (not adjusted by deltas) per statement: a cart's subtotal
+        # depends on current product prices, and carts are small.
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
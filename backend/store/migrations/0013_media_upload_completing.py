@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_cart_totals'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediaupload',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'Uploading'), ('completing', 'Completing'), ('complete', 'Complete')], default='uploading', max_length=10),
+        ),
+    ]
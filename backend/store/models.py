@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils.translation import gettext_lazy as _
 import uuid
 
@@ -56,6 +59,12 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Maintained by database triggers on store_product (see migration 0005);
+    # `manage.py repair_category_counts` recomputes them from scratch.
+    approved_products_count = models.IntegerField(default=0, editable=False)
+    pending_products_count = models.IntegerField(default=0, editable=False)
+    total_products_count = models.IntegerField(default=0, editable=False)
+
     class Meta:
         verbose_name_plural = 'Categories'
         ordering = ['name']
@@ -101,11 +110,48 @@ class Product(models.Model):
     owner = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='products'
+        related_name='products',
+        db_index=False,  # covered by product_owner_recent
+    )
+
+    # Maintained by Postgres on every INSERT/UPDATE, including queryset.update()
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
     )
 
     class Meta:
         ordering = ['-date_posted']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            GinIndex(
+                fields=['name'],
+                name='product_name_trgm',
+                opclasses=['gin_trgm_ops'],
+                condition=models.Q(status='approved'),
+            ),
+            # Moderation queue: pending products oldest first
+            models.Index(
+                fields=['date_posted', 'id'],
+                name='product_pending_queue',
+                condition=models.Q(status='pending'),
+            ),
+            # Catalog pages: approved products newest first, keyset on (date_posted, id)
+            models.Index(
+                fields=['-date_posted', '-id'],
+                name='product_approved_recent',
+                condition=models.Q(status='approved'),
+            ),
+            models.Index(fields=['owner', '-date_posted'], name='product_owner_recent'),
+            models.Index(fields=['category', 'status', '-date_posted'], name='product_category_status'),
+            # Price/name sorting and price ranges; id keeps keyset pagination on the index
+            models.Index(fields=['status', 'price', 'id'], name='product_status_price'),
+            models.Index(fields=['status', 'name', 'id'], name='product_status_name'),
+        ]
 
     def __str__(self):
         return self.name
@@ -115,6 +161,198 @@ class Product(models.Model):
         return self.status == self.Status.APPROVED
 
 
+# ==================== MEDIA UPLOADS ====================
+
+class MediaUpload(models.Model):
+    """
+    Resumable upload session for one large product media file. The client
+    PUTs fixed-size chunks, in any order and retrying as needed, which are
+    written at their offsets into a staging file; completing the upload moves
+    it into content-addressed storage. Completed uploads are attached to a
+    product by listing their ids when the product is created.
+    """
+
+    class Kind(models.TextChoices):
+        IMAGE = 'images', 'Image'
+        VIDEO = 'videos', 'Video'
+
+    class Status(models.TextChoices):
+        UPLOADING = 'uploading', 'Uploading'
+        COMPLETING = 'completing', 'Completing'
+        COMPLETE = 'complete', 'Complete'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='media_uploads')
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received_chunks = ArrayField(models.PositiveIntegerField(), default=list, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.UPLOADING)
+    url = models.CharField(max_length=500, blank=True)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='media_uploads',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index):
+        """Bytes expected in chunk `index`; only the last one may be short"""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    @property
+    def missing_chunks(self):
+        received = set(self.received_chunks)
+        return [index for index in range(self.chunk_count) if index not in received]
+
+
+class ProductMedia(models.Model):
+    """
+    One image or video of a product, in display order, with file metadata.
+    Rows mirror Product.images / Product.videos and are kept in step by a
+    database trigger (see migration 0010), so every write path, including
+    COPY imports and queryset.update(), is covered; never write the URLs
+    here directly. Size and dimensions are filled in afterwards by
+    store.product_media.describe_media.
+    """
+    Kind = MediaUpload.Kind
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='media', db_index=False)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    position = models.PositiveSmallIntegerField()
+    url = models.TextField()
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    bytes = models.BigIntegerField(null=True, blank=True)
+    # SHA-256 of the content, taken from content-addressed URLs; blank for legacy files
+    hash = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        ordering = ['product', 'kind', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'kind', 'position'], name='product_media_position'),
+        ]
+        indexes = [
+            # The one row list pages need per product: its first image
+            models.Index(
+                fields=['product'],
+                name='product_media_primary',
+                condition=models.Q(kind='images', position=0),
+                include=['url'],
+            ),
+            models.Index(fields=['hash'], name='product_media_hash', condition=~models.Q(hash='')),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.kind}[{self.position}]"
+
+
+# ==================== MODERATION QUEUE ====================
+
+class ModerationClaim(models.Model):
+    """
+    Time-bounded lease on a pending product, handed out by the moderation
+    queue so that concurrent moderators never review the same product.
+    An expired claim simply returns the product to the queue.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='moderation_claim',
+    )
+    moderator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='moderation_claims')
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product_id} claimed by {self.moderator_id} until {self.expires_at}"
+
+
+# ==================== PRODUCT LISTING (READ MODEL) ====================
+
+class ProductListing(models.Model):
+    """
+    Denormalized copy of approved products holding what catalog pages render,
+    so they read one narrow table with no joins. Maintained by database
+    triggers on products, users and categories (see migration 0007);
+    never write to it directly.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    name = models.CharField(max_length=200)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.DO_NOTHING,
+        null=True,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+    )
+    category_name = models.CharField(max_length=100, null=True)
+    owner = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    owner_name = models.CharField(max_length=301, blank=True)
+    primary_image = models.TextField(null=True)
+    status = models.CharField(max_length=20, choices=Product.Status.choices, default=Product.Status.APPROVED)
+    date_posted = models.DateTimeField()
+    search_vector = SearchVectorField(null=True)
+
+    class Meta:
+        ordering = ['-date_posted']
+        indexes = [
+            models.Index(fields=['-date_posted', '-id'], name='listing_recent'),
+            models.Index(fields=['category', '-date_posted'], name='listing_category_recent'),
+            models.Index(fields=['price', 'id'], name='listing_price'),
+            models.Index(fields=['name', 'id'], name='listing_name'),
+            GinIndex(fields=['search_vector'], name='listing_search_vector_gin'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ProductChange(models.Model):
+    """
+    Append-only log of catalog changes for incremental client sync, written
+    by triggers on the ProductListing read model (see migration 0011): a
+    product entering or changing in the catalog logs 'approved', leaving it
+    logs its new status or 'deleted'. `txid` is the writing transaction's id,
+    which lets the feed hand out only changes that can no longer be
+    overtaken by a slower transaction.
+    """
+
+    class Status(models.TextChoices):
+        APPROVED = 'approved', 'Approved'
+        PENDING = 'pending', 'Pending'
+        REJECTED = 'rejected', 'Rejected'
+        DELETED = 'deleted', 'Deleted'
+
+    id = models.BigAutoField(primary_key=True)
+    # Not a foreign key: tombstones outlive their product
+    product_id = models.UUIDField()
+    status = models.CharField(max_length=20, choices=Status.choices)
+    txid = models.BigIntegerField()
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='product_change_cursor'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.status} at {self.changed_at}"
+
+
 # ==================== ORDER ====================
 
 class Order(models.Model):
@@ -126,7 +364,12 @@ class Order(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     order_id = models.CharField(max_length=20, unique=True, editable=False)
-    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    customer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='orders',
+        db_index=False,  # covered by order_customer_recent
+    )
 
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
@@ -141,6 +384,9 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['customer', '-created_at'], name='order_customer_recent'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id}"
@@ -178,13 +424,14 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Maintained by database triggers on cart items and product prices (see
+    # migration 0012), which also bump updated_at so cart validators move
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+
     def __str__(self):
         return f"Cart for {self.user.username}"
 
-    @property
-    def total(self):
-        return sum(item.subtotal for item in self.items.all())
-
 
 # ==================== CART ITEM ====================
 
@@ -220,7 +467,12 @@ class Payment(models.Model):
     transaction_id = models.CharField(max_length=100, unique=True, editable=False)
 
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='payments')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payments')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='payments',
+        db_index=False,  # covered by payment_user_recent
+    )
 
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     phone_number = models.CharField(max_length=20)
@@ -239,6 +491,9 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='payment_user_recent'),
+        ]
 
     def __str__(self):
         return f"Payment {self.transaction_id}"
@@ -0,0 +1,191 @@
+"""
+Product moderation: the claim/lease queue and bulk decisions.
+
+Moderators claim batches of pending products from a shared queue. Claiming
+locks candidate rows with SKIP LOCKED, so concurrent moderators never wait
+on or receive the same products, and records a time-bounded lease so the
+products stay out of everyone else's batches until it expires.
+
+Decisions for any number of products are applied with one locking SELECT
+and one UPDATE per action (and per distinct rejection reason) inside a
+single transaction. Sellers get one email per batch covering all of their
+products, sent after the transaction commits.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ModerationClaim, Product
+from .suggest import product_name_index
+
+logger = logging.getLogger(__name__)
+
+APPROVE = 'approve'
+REJECT = 'reject'
+ACTIONS = (APPROVE, REJECT)
+
+RESULT_FOR_ACTION = {APPROVE: Product.Status.APPROVED, REJECT: Product.Status.REJECTED}
+NOT_FOUND = 'not_found'
+CLAIMED = 'claimed'
+
+# Leases only ever move forward: a live claim held by someone else is left alone,
+# even if it was committed after this statement's snapshot was taken.
+CLAIM_SQL = f"""
+INSERT INTO {ModerationClaim._meta.db_table} AS c (product_id, moderator_id, expires_at)
+SELECT unnest(%(ids)s::uuid[]), %(moderator)s, %(expires_at)s
+ON CONFLICT (product_id) DO UPDATE
+SET moderator_id = EXCLUDED.moderator_id, expires_at = EXCLUDED.expires_at
+WHERE c.moderator_id = EXCLUDED.moderator_id OR c.expires_at <= %(now)s
+RETURNING product_id
+"""
+
+
+def claim_products(moderator, size, lease_seconds=None):
+    """
+    Lease up to `size` pending products, oldest first, to `moderator`.
+    The moderator's own unexpired claims are eligible too and get renewed,
+    so retrying a claim never loses work. Returns (products, expires_at).
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=lease_seconds or settings.MODERATION_LEASE_SECONDS)
+    with transaction.atomic():
+        candidates = list(
+            Product.objects.filter(status=Product.Status.PENDING)
+            .filter(
+                Q(moderation_claim__isnull=True)
+                | Q(moderation_claim__expires_at__lte=now)
+                | Q(moderation_claim__moderator=moderator)
+            )
+            .select_related('owner', 'category')
+            .order_by('date_posted', 'pk')
+            .select_for_update(skip_locked=True, of=('self',))[:size]
+        )
+        if not candidates:
+            return [], expires_at
+        with connection.cursor() as cursor:
+            cursor.execute(CLAIM_SQL, {
+                'ids': [str(product.pk) for product in candidates],
+                'moderator': moderator.pk,
+                'expires_at': expires_at,
+                'now': now,
+            })
+            claimed = {row[0] for row in cursor.fetchall()}
+    return [product for product in candidates if product.pk in claimed], expires_at
+
+
+def release_claims(moderator, ids=None):
+    """Hand the moderator's claimed products (or just `ids`) back to the queue"""
+    claims = ModerationClaim.objects.filter(moderator=moderator)
+    if ids is not None:
+        claims = claims.filter(product_id__in=ids)
+    return claims.delete()[0]
+
+
+def moderate_products(decisions, moderator=None):
+    """
+    Apply `decisions`, a list of {'id', 'action', 'rejection_reason'} dicts
+    with unique ids. Returns [{'id', 'result'}] in request order, where result
+    is the product's new status, 'not_found', or 'claimed' when another
+    `moderator` holds a live lease on the product.
+    """
+    ids = [decision['id'] for decision in decisions]
+    with transaction.atomic():
+        claimed_elsewhere = set()
+        if moderator is not None:
+            claimed_elsewhere = set(
+                ModerationClaim.objects.filter(product_id__in=ids, expires_at__gt=timezone.now())
+                .exclude(moderator=moderator)
+                .values_list('product_id', flat=True)
+            )
+        products = {
+            product.pk: product
+            for product in Product.objects.filter(pk__in=ids)
+            .select_related('owner')
+            .only('id', 'name', 'owner__email', 'owner__first_name', 'owner__username')
+            .order_by('pk')  # lock in a fixed order so concurrent batches cannot deadlock
+            .select_for_update(of=('self',))
+            if product.pk not in claimed_elsewhere
+        }
+
+        approve = [d['id'] for d in decisions if d['action'] == APPROVE and d['id'] in products]
+        rejections = defaultdict(list)
+        for decision in decisions:
+            if decision['action'] == REJECT and decision['id'] in products:
+                rejections[decision['rejection_reason']].append(decision['id'])
+
+        now = timezone.now()
+        if approve:
+            Product.objects.filter(pk__in=approve).update(
+                status=Product.Status.APPROVED, rejection_reason=None, date_updated=now,
+            )
+        for reason, reject in rejections.items():
+            Product.objects.filter(pk__in=reject).update(
+                status=Product.Status.REJECTED, rejection_reason=reason, date_updated=now,
+            )
+
+        ModerationClaim.objects.filter(product_id__in=list(products)).delete()
+
+        moderated = [(products[d['id']], d) for d in decisions if d['id'] in products]
+        transaction.on_commit(lambda: _after_moderation(moderated), robust=True)
+
+    def result(decision):
+        if decision['id'] in products:
+            return RESULT_FOR_ACTION[decision['action']]
+        return CLAIMED if decision['id'] in claimed_elsewhere else NOT_FOUND
+
+    return [{'id': d['id'], 'result': result(d)} for d in decisions]
+
+
+def _after_moderation(moderated):
+    # queryset.update() sends no post_save, so mirror signals.index_product_name here
+    for product, decision in moderated:
+        if decision['action'] == APPROVE:
+            product_name_index.add(product.pk, product.name)
+        else:
+            product_name_index.discard(product.pk)
+    notify_sellers(moderated)
+
+
+def _seller_message(owner, decisions):
+    approved = [product.name for product, d in decisions if d['action'] == APPROVE]
+    rejected = [(product.name, d['rejection_reason']) for product, d in decisions if d['action'] == REJECT]
+    lines = [f'Hello {owner.first_name or owner.username},', '']
+    if approved:
+        lines.append('The following products have been approved and are now visible to customers:')
+        lines.extend(f'  - {name}' for name in approved)
+        lines.append('')
+    if rejected:
+        lines.append('The following products have been rejected:')
+        lines.extend(f'  - {name}: {reason}' for name, reason in rejected)
+        lines.append('')
+        lines.append('Please submit new products with the necessary corrections.')
+    if approved and not rejected:
+        subject = 'Your Products Have Been Approved'
+    elif rejected and not approved:
+        subject = 'Your Products Have Been Rejected'
+    else:
+        subject = 'Your Products Have Been Reviewed'
+    return subject, '\n'.join(lines)
+
+
+def notify_sellers(moderated):
+    """One email per seller summarising every decision about their products, over one connection"""
+    by_owner = defaultdict(list)
+    owners = {}
+    for product, decision in moderated:
+        if product.owner.email:
+            by_owner[product.owner_id].append((product, decision))
+            owners[product.owner_id] = product.owner
+    messages = [
+        (*_seller_message(owners[owner_id], decisions), settings.DEFAULT_FROM_EMAIL, [owners[owner_id].email])
+        for owner_id, decisions in by_owner.items()
+    ]
+    if messages:
+        sent = send_mass_mail(messages, fail_silently=False)
+        logger.info('Sent %d moderation emails for %d products', sent, len(moderated))
@@ -0,0 +1,187 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder truncates datetimes to milliseconds, which would skip rows"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset pagination over the queryset's own ordering with the pk as tiebreaker.
+
+    Each page is fetched with a range condition on the ordering columns
+    instead of OFFSET, and no COUNT is issued, so page N costs the same as
+    page 1 when an index matches the ordering. Works with whatever ordering
+    OrderingFilter (or the model's Meta.ordering) put on the queryset.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering_terms(self, queryset):
+        """Ordering as a list of (field, descending) pairs ending with the pk"""
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        terms = []
+        for term in ordering:
+            if not isinstance(term, str) or '__' in term or term == '?':
+                continue
+            field = term.lstrip('-')
+            if field == queryset.model._meta.pk.name:
+                field = 'pk'
+            terms.append((field, term.startswith('-')))
+            if field == 'pk':
+                break
+        if not terms or terms[-1][0] != 'pk':
+            terms.append(('pk', terms[0][1] if terms else False))
+        return terms
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.terms = self.get_ordering_terms(queryset)
+        self.model = queryset.model
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+        if cursor:
+            queryset = queryset.filter(self.keyset_filter(cursor['values'], reverse))
+
+        order_by = [
+            ('-' if descending != reverse else '') + field
+            for field, descending in self.terms
+        ]
+        results = list(queryset.order_by(*order_by)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def keyset_filter(self, values, reverse):
+        """
+        Rows strictly after `values` in the (possibly reversed) ordering.
+        The leading >=/<= bound on the first column lets Postgres start an
+        index range scan at the cursor; the nested ORs only resolve ties.
+        """
+        condition = None
+        for (field, descending), value in reversed(list(zip(self.terms, values))):
+            lookup = 'lt' if descending != reverse else 'gt'
+            strict = Q(**{f'{field}__{lookup}': value})
+            condition = strict if condition is None else strict | (Q(**{field: value}) & condition)
+        first_field, first_descending = self.terms[0]
+        bound = 'lte' if first_descending != reverse else 'gte'
+        return Q(**{f'{first_field}__{bound}': values[0]}) & condition
+
+    def _field_value(self, field, raw):
+        try:
+            model_field = self.model._meta.pk if field == 'pk' else self.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            return raw  # annotation such as search_rank
+        return model_field.to_python(raw)
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'o': [('-' if descending else '') + field for field, descending in self.terms],
+            'v': [getattr(instance, field) for field, _ in self.terms],
+            'r': reverse,
+        }
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, cls=CursorEncoder, separators=(',', ':')).encode()
+        ).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            ordering = [('-' if descending else '') + field for field, descending in self.terms]
+            if payload['o'] != ordering or len(payload['v']) != len(self.terms):
+                raise ValueError
+            values = [
+                self._field_value(field, raw)
+                for (field, _), raw in zip(self.terms, payload['v'])
+            ]
+            return {'values': values, 'reverse': bool(payload['r'])}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; clients opt into keyset pagination
+    by sending a `cursor` parameter (empty for the first page).
+    """
+    cursor_class = KeysetCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_class.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
@@ -0,0 +1,93 @@
+"""
+Reading and describing ProductMedia rows.
+
+List endpoints show one image per product, so instead of loading the whole
+JSON media lists they prefetch just each product's primary row, answered
+from the product_media_primary index. File metadata the database trigger
+cannot know (size, dimensions) is filled in from the files themselves.
+"""
+import os
+
+from django.conf import settings
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from .derivatives import media_path
+from .models import ProductMedia
+
+# EXIF orientations that rotate the image by 90 degrees, swapping width and height
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+EXIF_ORIENTATION = 0x0112
+
+
+def primary_media_prefetch(lookup='media'):
+    """Prefetch each product's first image into `primary_media` (a list of zero or one rows)"""
+    return Prefetch(
+        lookup,
+        queryset=ProductMedia.objects.filter(kind=ProductMedia.Kind.IMAGE, position=0)
+        .only('id', 'product_id', 'url').order_by(),
+        to_attr='primary_media',
+    )
+
+
+def primary_image_subquery(product_ref):
+    """
+    The first image URL of the product referenced by `product_ref`, for
+    querysets that join products in rather than prefetching their media
+    """
+    return Subquery(
+        ProductMedia.objects.filter(product=OuterRef(product_ref), kind=ProductMedia.Kind.IMAGE, position=0)
+        .order_by().values('url')[:1]
+    )
+
+
+def set_primary_media(product, url):
+    """Fill in what primary_media_prefetch() would have from an annotated URL"""
+    product.primary_media = [ProductMedia(product=product, kind=ProductMedia.Kind.IMAGE, position=0, url=url)] if url else []
+
+
+def primary_image_url(product):
+    """URL of the product's first image, from the primary media prefetch when there is one"""
+    media = getattr(product, 'primary_media', None)
+    if media is None:
+        images = product.images
+        return images[0] if images else None
+    return media[0].url if media else None
+
+
+def _image_size(path):
+    from PIL import Image
+
+    with Image.open(path) as image:  # parses the header only
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+    return width, height
+
+
+def describe_media(media):
+    """
+    Fill in `bytes` and, for images, `width`/`height` of local media rows
+    from their files with one bulk UPDATE. Returns how many rows were described.
+    """
+    described = []
+    for item in media:
+        path = media_path(item.url)
+        if path is None:
+            continue
+        try:
+            item.bytes = os.path.getsize(path)
+        except OSError:
+            continue
+        if item.kind == ProductMedia.Kind.IMAGE:
+            try:
+                item.width, item.height = _image_size(path)
+            except Exception:
+                pass  # not an image Pillow understands; the size is still useful
+        described.append(item)
+    ProductMedia.objects.bulk_update(described, ['bytes', 'width', 'height'], batch_size=500)
+    return len(described)
+
+
+def undescribed_media():
+    """Local media rows whose metadata has not been filled in yet"""
+    return ProductMedia.objects.filter(bytes__isnull=True, url__startswith=settings.MEDIA_URL)
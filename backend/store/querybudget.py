@@ -0,0 +1,91 @@
+"""
+Query budgets and N+1 detection.
+
+Views declare `query_budget`, the most SQL queries a request may issue no
+matter how many rows are involved. `QueryInspectionMiddleware` checks it in
+development and `manage.py check_query_budgets` enforces it at several data
+volumes.
+"""
+import re
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import connections
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \([^)]*\)', re.IGNORECASE)
+
+
+def query_shape(sql):
+    """SQL with literals and IN lists collapsed, so N+1 repeats compare equal"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+def _serializer_source():
+    """Name the serializer field being rendered when the current query fired"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if (
+            frame.f_code.co_name == 'to_representation'
+            and frame.f_globals.get('__name__') == 'rest_framework.serializers'
+            and 'field' in frame.f_locals
+        ):
+            serializer = frame.f_locals.get('self')
+            field = frame.f_locals['field']
+            return f'{type(serializer).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryRecorder:
+    """execute_wrapper that remembers every query, optionally with its serializer source"""
+
+    def __init__(self, capture_source=False):
+        self.capture_source = capture_source
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        source = _serializer_source() if self.capture_source else None
+        self.queries.append((sql, source))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated_shapes(self, threshold=3):
+        """(shape, count, sources) for query shapes issued at least `threshold` times"""
+        counts = defaultdict(int)
+        sources = defaultdict(set)
+        for sql, source in self.queries:
+            shape = query_shape(sql)
+            counts[shape] += 1
+            if source:
+                sources[shape].add(source)
+        return [
+            (shape, count, sorted(sources[shape]))
+            for shape, count in counts.items()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def record_queries(using='default', capture_source=False):
+    recorder = QueryRecorder(capture_source=capture_source)
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+
+
+def get_query_budget(view):
+    """Budget declared on a view class or instance, or None"""
+    return getattr(view, 'query_budget', None)
+
+
+def resolve_view_class(request):
+    match = getattr(request, 'resolver_match', None)
+    func = getattr(match, 'func', None)
+    return getattr(func, 'view_class', None) or getattr(func, 'cls', None)
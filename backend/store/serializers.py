@@ -1,7 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from .models import UserProfile, Category, Product, Order, OrderItem, Cart, CartItem, Payment
+from django.conf import settings
+from .derivatives import thumbnail_url
+from .models import (
+    UserProfile, Category, Product, Order, OrderItem, Cart, CartItem, Payment, ProductListing, MediaUpload,
+    ProductChange
+)
+from .product_media import primary_image_url
+from .uploads import attachable_uploads
 
 User = get_user_model()
 
@@ -86,15 +93,24 @@ class AdminUserSerializer(serializers.ModelSerializer):
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer for product categories"""
-    products_count = serializers.SerializerMethodField()
+    products_count = serializers.IntegerField(source='approved_products_count', read_only=True)
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'products_count', 'created_at']
-        read_only_fields = ['id', 'created_at']
-    
-    def get_products_count(self, obj):
-        return obj.products.count()
+        fields = [
+            'id', 'name', 'description', 'products_count',
+            'pending_products_count', 'total_products_count', 'created_at'
+        ]
+        read_only_fields = ['id', 'pending_products_count', 'total_products_count', 'created_at']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        # Shoppers only see approved products, so hide moderation counts from them
+        if not (request and getattr(request.user, 'is_admin', False)):
+            data.pop('pending_products_count')
+            data.pop('total_products_count')
+        return data
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -114,36 +130,101 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 class ProductListSerializer(serializers.ModelSerializer):
-    """Serializer for product listings"""
+    """
+    Serializer for product listings. Only the primary image is rendered;
+    querysets should defer the media lists and use primary_media_prefetch().
+    """
     owner_name = serializers.CharField(source='owner.get_full_name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
+    primary_image = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'price', 'category', 'category_name',
-            'images', 'videos', 'status', 'date_posted', 'owner_name'
+            'status', 'date_posted', 'owner_name', 'primary_image', 'thumbnail'
         ]
         read_only_fields = ['id', 'status', 'date_posted']
 
+    def get_primary_image(self, obj):
+        return primary_image_url(obj)
+
+    def get_thumbnail(self, obj):
+        image = primary_image_url(obj)
+        return thumbnail_url(image) if image else None
+
+
+class ProductListingSerializer(serializers.ModelSerializer):
+    """Same shape as ProductListSerializer, read from the ProductListing table"""
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductListing
+        fields = ProductListSerializer.Meta.fields
+        read_only_fields = fields
+
+    def get_thumbnail(self, obj):
+        return thumbnail_url(obj.primary_image) if obj.primary_image else None
+
+
+class ProductChangeSerializer(serializers.ModelSerializer):
+    """
+    One entry of the catalog change feed. `product` holds the current listing
+    for approved products and is null for tombstones (rejected, pending, deleted).
+    Needs the listing rows by product id in context['listings'].
+    """
+    id = serializers.UUIDField(source='product_id', read_only=True)
+    product = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductChange
+        fields = ['id', 'status', 'changed_at', 'product']
+        read_only_fields = fields
+
+    def get_product(self, obj):
+        listing = self.context['listings'].get(obj.product_id)
+        return ProductListingSerializer(listing).data if listing is not None else None
+
 
 class ProductCreateSerializer(serializers.ModelSerializer):
-    """Serializer for creating products with multiple images and videos"""
+    """
+    Serializer for creating products with multiple images and videos.
+    `uploads` attaches completed resumable uploads; call it inside a
+    transaction so the uploads stay locked until the product is saved.
+    """
+    uploads = serializers.ListField(child=serializers.UUIDField(), required=False, write_only=True, max_length=20)
     
     class Meta:
         model = Product
-        fields = ['name', 'description', 'price', 'category', 'images', 'videos']
+        fields = ['name', 'description', 'price', 'category', 'images', 'videos', 'uploads']
+
+    def validate_uploads(self, ids):
+        ids = list(dict.fromkeys(ids))
+        uploads = attachable_uploads(self.context['request'].user, ids)
+        if len(uploads) != len(ids):
+            found = {upload.pk for upload in uploads}
+            unusable = ', '.join(str(pk) for pk in ids if pk not in found)
+            raise serializers.ValidationError(f"Uploads not found, not complete or already attached: {unusable}")
+        return uploads
 
     def validate(self, attrs):
-        images = attrs.get('images') or []
-        videos = attrs.get('videos') or []
+        images = list(attrs.get('images') or [])
+        videos = list(attrs.get('videos') or [])
+        for upload in attrs.get('uploads', []):
+            (images if upload.kind == MediaUpload.Kind.IMAGE else videos).append(upload.url)
         if len(images) == 0 and len(videos) == 0:
             raise serializers.ValidationError("At least one image or video is required.")
+        attrs['images'], attrs['videos'] = images, videos
         return attrs
     
     def create(self, validated_data):
+        uploads = validated_data.pop('uploads', [])
         validated_data['owner'] = self.context['request'].user
-        return super().create(validated_data)
+        product = super().create(validated_data)
+        if uploads:
+            MediaUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).update(product=product)
+        return product
 
 
 class ProductApprovalSerializer(serializers.ModelSerializer):
@@ -159,6 +240,62 @@ class ProductApprovalSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ModerationDecisionSerializer(serializers.Serializer):
+    """One approve/reject decision in a bulk moderation request"""
+    id = serializers.UUIDField()
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    rejection_reason = serializers.CharField(required=False, allow_blank=True)
+
+
+class BulkModerationSerializer(serializers.Serializer):
+    """
+    Bulk approve/reject. `rejection_reason` at the top level applies to every
+    rejection that does not carry its own.
+    """
+    decisions = ModerationDecisionSerializer(many=True, allow_empty=False, max_length=2000)
+    rejection_reason = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        default_reason = attrs.get('rejection_reason', '').strip()
+        seen = set()
+        errors = {}
+        for index, decision in enumerate(attrs['decisions']):
+            if decision['id'] in seen:
+                errors[index] = f"Product {decision['id']} appears more than once."
+            seen.add(decision['id'])
+            if decision['action'] == 'reject':
+                decision['rejection_reason'] = decision.get('rejection_reason', '').strip() or default_reason
+                if not decision['rejection_reason']:
+                    errors[index] = "Rejection reason is required when rejecting a product."
+        if errors:
+            raise serializers.ValidationError({'decisions': errors})
+        return attrs
+
+
+class ModerationReleaseSerializer(serializers.Serializer):
+    """Products to hand back to the moderation queue; all of the moderator's claims if omitted"""
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=2000)
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """Resumable upload session; `missing_chunks` tells a resuming client what is left to send"""
+    chunk_count = serializers.IntegerField(read_only=True)
+    missing_chunks = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    
+    class Meta:
+        model = MediaUpload
+        fields = [
+            'id', 'kind', 'filename', 'size', 'chunk_size', 'chunk_count', 'missing_chunks',
+            'status', 'url', 'product', 'created_at',
+        ]
+        read_only_fields = ['chunk_size', 'status', 'url', 'product']
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.MEDIA_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Size must be between 1 and {settings.MEDIA_UPLOAD_MAX_SIZE} bytes.")
+        return value
+
+
 class ProductSearchSerializer(serializers.ModelSerializer):
     """Serializer for product search results"""
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -182,9 +319,8 @@ class OrderItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'price']
 
     def get_product_image(self, obj):
-        if obj.product.images and len(obj.product.images) > 0:
-            return obj.product.images[0]
-        return None
+        image = primary_image_url(obj.product)
+        return thumbnail_url(image) if image else None
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -231,24 +367,25 @@ class CartItemSerializer(serializers.ModelSerializer):
         return data
 
 
-class CartSerializer(serializers.ModelSerializer):
-    """Serializer for shopping cart"""
-    items = CartItemSerializer(many=True, read_only=True)
-    total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    items_count = serializers.SerializerMethodField()
-    
+class CartBadgeSerializer(serializers.ModelSerializer):
+    """Just the cart's stored totals, for the cart badge"""
+    total = serializers.DecimalField(source='subtotal', max_digits=12, decimal_places=2, read_only=True)
+    items_count = serializers.IntegerField(source='item_count', read_only=True)
+
     class Meta:
         model = Cart
-        fields = ['id', 'user', 'items', 'total', 'items_count', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        fields = ['total', 'items_count']
+        read_only_fields = fields
 
-    def get_items_count(self, obj):
-        return obj.items.count()
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data['total'] = str(instance.total)
-        return data
+class CartSerializer(CartBadgeSerializer):
+    """Serializer for shopping cart; expects the items loaded into `lines` (see store.carts)"""
+    items = CartItemSerializer(source='lines', many=True, read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = ['id', 'user', 'items', 'total', 'items_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
 
 
 class AddToCartSerializer(serializers.Serializer):
@@ -257,6 +394,59 @@ class AddToCartSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(default=1, min_value=1)
 
 
+class CartOperationSerializer(serializers.Serializer):
+    """One add/set/remove in a batch cart update; `set` to 0 removes the item"""
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    product_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'add':
+            attrs.setdefault('quantity', 1)
+            if attrs['quantity'] < 1:
+                raise serializers.ValidationError({'quantity': 'Ensure this value is greater than or equal to 1.'})
+        elif attrs['op'] == 'set' and 'quantity' not in attrs:
+            raise serializers.ValidationError({'quantity': 'This field is required.'})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """
+    Cart operations applied in order, all or nothing. Products being added
+    must be approved; they are checked with one query.
+    """
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=500)
+
+    def validate_operations(self, operations):
+        wanted = {op['product_id'] for op in operations if op['op'] != 'remove' and op['quantity'] > 0}
+        available = set(
+            Product.objects.filter(pk__in=wanted, status=Product.Status.APPROVED).values_list('pk', flat=True)
+        ) if wanted else set()
+        errors = {
+            index: f"Product {op['product_id']} not found or not available."
+            for index, op in enumerate(operations)
+            if op['op'] != 'remove' and op['quantity'] > 0 and op['product_id'] not in available
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        return operations
+
+
+class GuestCartItemSerializer(serializers.Serializer):
+    """A guest cart line; guest carts change by product id, so lines have no id"""
+    product = ProductListingSerializer(read_only=True)
+    quantity = serializers.IntegerField(read_only=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+
+class GuestCartSerializer(serializers.Serializer):
+    """A cart held in the cache for a shopper who has not logged in (see store.guest_carts)"""
+    cart_token = serializers.CharField(read_only=True, allow_null=True)
+    items = GuestCartItemSerializer(many=True, read_only=True)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    items_count = serializers.IntegerField(read_only=True)
+
+
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     """Serializer for updating cart item quantity"""
     
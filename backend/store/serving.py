@@ -0,0 +1,165 @@
+"""
+Serving uploaded media.
+
+`serve_media` answers /media/ requests in every environment. It supports
+single byte ranges (so video players can seek), conditional GET, and
+year-long immutable caching for content-addressed files, whose URL changes
+whenever their bytes do. With MEDIA_SERVE_MODE set to 'x-accel-redirect'
+(nginx) or 'x-sendfile' (Apache, lighttpd) the view only resolves the file
+and the front proxy streams it, ranges included, without holding a worker.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+SERVE_MODES = ('django', 'x-accel-redirect', 'x-sendfile')
+
+# <prefix>/<folder>/ab/cd/<sha256>[.derivative].<ext>, as written by store.media and store.derivatives
+CONTENT_ADDRESSED_RE = re.compile(r'^[^/]+/[^/]+/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(\.[\w.]+)?$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60 * 60
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def is_content_addressed(path):
+    return CONTENT_ADDRESSED_RE.match(path) is not None
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single-range `Range` header, None to ignore
+    the header (absent, malformed or multi-range), or False if unsatisfiable.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        if int(last) == 0:
+            return False
+        start, end = max(0, size - int(last)), size - 1  # suffix: the last N bytes
+    else:
+        return None
+    if start >= size:
+        return False
+    return start, end
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            block = file.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        file.close()
+
+
+def _resolve(path):
+    # Hidden segments cover in-flight and staged uploads (products/.incoming)
+    if any(segment.startswith('.') for segment in path.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path, stat
+
+
+def _offloaded_response(path, full_path):
+    response = HttpResponse()
+    if settings.MEDIA_SERVE_MODE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(posixpath.join(settings.MEDIA_ACCEL_REDIRECT_PREFIX, path))
+    elif settings.MEDIA_SERVE_MODE == 'x-sendfile':
+        response['X-Sendfile'] = full_path
+    else:
+        raise ImproperlyConfigured(f'MEDIA_SERVE_MODE must be one of {", ".join(SERVE_MODES)}')
+    # The proxy fills in Content-Type, Content-Length and ranges from the file itself
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT, or hand it to the front proxy to serve"""
+    full_path, stat = _resolve(path)
+
+    if settings.MEDIA_SERVE_MODE != 'django':
+        response = _offloaded_response(path, full_path)
+    else:
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        last_modified = int(stat.st_mtime)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = _file_response(request, full_path, stat.st_size, etag, last_modified)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+
+    if response.status_code >= 400:
+        return response
+    if is_content_addressed(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+    return response
+
+
+def _file_response(request, full_path, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is not None and not _if_range_matches(request.headers.get('If-Range'), etag, last_modified):
+        byte_range = None  # the client's partial copy is stale; send the whole file
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(open(full_path, 'rb'), start, end - start + 1), status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+def _if_range_matches(header, etag, last_modified):
+    if not header:
+        return True
+    if header.startswith(('"', 'W/')):
+        return header == etag  # strong comparison only
+    return parse_http_date_safe(header) == last_modified
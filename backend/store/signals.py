@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserProfile
+from .models import UserProfile, Category, Product
+from .cache import category_cache
+from .suggest import product_name_index
 
 User = get_user_model()
 
@@ -18,3 +21,27 @@ def save_user_profile(sender, instance, **kwargs):
     """Save UserProfile when user is saved"""
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+@receiver(post_save, sender=Product)
+def index_product_name(sender, instance, **kwargs):
+    """Keep the autocomplete index in step with approvals and rejections"""
+    product_id, name = instance.pk, instance.name
+    if instance.status == Product.Status.APPROVED:
+        transaction.on_commit(lambda: product_name_index.add(product_id, name))
+    else:
+        transaction.on_commit(lambda: product_name_index.discard(product_id))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product_name(sender, instance, **kwargs):
+    """Drop deleted products from the autocomplete index"""
+    product_id = instance.pk
+    transaction.on_commit(lambda: product_name_index.discard(product_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    """Any category write (API or admin) invalidates cached category data everywhere"""
+    transaction.on_commit(category_cache.bump)
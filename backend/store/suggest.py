@@ -0,0 +1,180 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+
+from .models import Product
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+class ProductNameIndex:
+    """
+    In-process word-prefix index over approved product names.
+
+    Every product contributes one sorted entry per word start, so "lap"
+    matches both "Laptop Stand" and "Dell Laptop". Lookups are a bisect
+    plus a short forward scan. Changes made through this worker are applied
+    incrementally; other workers pick them up on their next rebuild, which
+    starts once the index is older than `max_age` seconds.
+
+    Rebuilds run in a background thread, one at a time, while lookups keep
+    answering from the previous entries (or, before the first build
+    finishes, return nothing and leave suggestions to the trigram query).
+    Changes reported while a rebuild is scanning are replayed on top of the
+    new entries, so the swap never loses them.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = []
+        self._entries_by_id = {}
+        self._built_at = None
+        self._rebuilding = False
+        self._pending = []
+
+    @staticmethod
+    def _keys(name):
+        normalized = _normalize(name)
+        return {normalized[match.start():] for match in _WORD_RE.finditer(normalized)}
+
+    def _insert(self, product_id, name):
+        entries = [(key, str(product_id), name) for key in self._keys(name)]
+        for entry in entries:
+            insort(self._entries, entry)
+        self._entries_by_id[str(product_id)] = entries
+
+    def _remove(self, product_id):
+        for entry in self._entries_by_id.pop(str(product_id), []):
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def _apply(self, product_id, name):
+        """Caller holds the lock; a name of None removes the product"""
+        if self._rebuilding:
+            self._pending.append((product_id, name))
+        if self._built_at is None:
+            return
+        self._remove(product_id)
+        if name is not None:
+            self._insert(product_id, name)
+
+    def _claim_rebuild(self):
+        with self._lock:
+            if self._rebuilding:
+                return False
+            self._rebuilding = True
+            self._pending = []
+            return True
+
+    def _scan_and_swap(self):
+        try:
+            rows = Product.objects.filter(status=Product.Status.APPROVED).values_list('id', 'name')
+            entries, entries_by_id = [], {}
+            for product_id, name in rows.iterator(chunk_size=5000):
+                product_entries = [(key, str(product_id), name) for key in self._keys(name)]
+                entries.extend(product_entries)
+                entries_by_id[str(product_id)] = product_entries
+            entries.sort()
+            with self._lock:
+                self._entries = entries
+                self._entries_by_id = entries_by_id
+                self._built_at = time.monotonic()
+                for product_id, name in self._pending:
+                    self._remove(product_id)
+                    if name is not None:
+                        self._insert(product_id, name)
+        finally:
+            with self._lock:
+                self._rebuilding = False
+                self._pending = []
+
+    def rebuild(self):
+        """Rebuild now in this thread, unless a rebuild is already running"""
+        if self._claim_rebuild():
+            self._scan_and_swap()
+
+    def rebuild_in_background(self):
+        if self._claim_rebuild():
+            threading.Thread(target=self._rebuild_thread, name='product-name-index', daemon=True).start()
+
+    def _rebuild_thread(self):
+        try:
+            self._scan_and_swap()
+        finally:
+            connection.close()
+
+    def is_built(self):
+        return self._built_at is not None
+
+    def _ensure_fresh(self):
+        built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > self.max_age:
+            self.rebuild_in_background()
+
+    def add(self, product_id, name):
+        with self._lock:
+            self._apply(product_id, name)
+
+    def discard(self, product_id):
+        with self._lock:
+            self._apply(product_id, None)
+
+    def lookup(self, prefix, limit=8):
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        results, seen = [], set()
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(results) < limit:
+                key, product_id, name = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if product_id not in seen:
+                    seen.add(product_id)
+                    results.append({'id': product_id, 'name': name})
+                position += 1
+        # Names that start with the prefix read better than mid-name matches
+        results.sort(key=lambda item: not _normalize(item['name']).startswith(prefix))
+        return results
+
+
+product_name_index = ProductNameIndex()
+
+# Below this length trigram matching is mostly noise
+FUZZY_MIN_LENGTH = 3
+
+
+def suggest_product_names(text, limit=8):
+    """Prefix matches from the in-process index, topped up with trigram (typo-tolerant) matches"""
+    results = product_name_index.lookup(text, limit)
+    text = _normalize(text)
+    if len(results) >= limit or len(text) < FUZZY_MIN_LENGTH:
+        return results
+
+    seen = {item['id'] for item in results}
+    fuzzy = (
+        Product.objects
+        .filter(status=Product.Status.APPROVED, name__trigram_word_similar=text)
+        .annotate(similarity=TrigramWordSimilarity(text, 'name'))
+        .order_by('-similarity', 'name')
+        .values_list('id', 'name')[:limit]
+    )
+    for product_id, name in fuzzy:
+        if len(results) >= limit:
+            break
+        if str(product_id) not in seen:
+            seen.add(str(product_id))
+            results.append({'id': str(product_id), 'name': name})
+    return results
@@ -0,0 +1,172 @@
+"""
+Resumable chunked uploads for large product media.
+
+A session records the file's size and a fixed chunk size. Each chunk is
+streamed from the request straight to its offset in a pre-sized staging file
+next to the content-addressed store, so neither the chunk nor the file is
+ever held in memory and a dropped connection only costs the chunk in flight.
+Received chunks are recorded with one atomic UPDATE, so chunks can be sent
+in parallel and re-sent safely. Completing the upload hashes the staging
+file into content-addressed storage without holding a transaction open.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F, Func, Value
+from django.utils import timezone
+
+from .derivatives import schedule_derivatives
+from .media import product_media_storage
+from .models import MediaUpload
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# A `completing` upload whose copy has not finished by then (the worker died) can be completed again
+COMPLETION_LEASE = timedelta(minutes=15)
+
+
+class UploadError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def staging_path(upload):
+    # Next to the storage's own in-flight files, never under a served URL path
+    return os.path.join(product_media_storage.root, '.incoming', f'{upload.pk}.part')
+
+
+def start_upload(owner, kind, filename, size):
+    """Open an upload session with a sparse staging file of the full size"""
+    upload = MediaUpload.objects.create(
+        owner=owner, kind=kind, filename=os.path.basename(filename), size=size,
+        chunk_size=settings.MEDIA_UPLOAD_CHUNK_SIZE,
+    )
+    path = staging_path(upload)
+    product_media_storage.ensure_dir(os.path.dirname(path))
+    with open(path, 'wb') as staging:
+        staging.truncate(size)
+    return upload
+
+
+def write_chunk(upload, index, stream, length):
+    """
+    Copy chunk `index` of `length` bytes from `stream` to its offset in the
+    staging file and record it. Returns False if the chunk had already been
+    received (a retry), in which case nothing is written.
+    """
+    if upload.status != MediaUpload.Status.UPLOADING:
+        raise UploadError(f'Upload is already {upload.status}', status=409)
+    if not 0 <= index < upload.chunk_count:
+        raise UploadError(f'Chunk index must be between 0 and {upload.chunk_count - 1}')
+    expected = upload.chunk_length(index)
+    if length != expected:
+        raise UploadError(f'Chunk {index} must be exactly {expected} bytes, got {length}')
+    if index in upload.received_chunks:
+        return False
+
+    try:
+        staging = open(staging_path(upload), 'r+b')
+    except FileNotFoundError:
+        raise UploadError('Upload is no longer available', status=410)
+    with staging:
+        staging.seek(index * upload.chunk_size)
+        remaining = expected
+        while remaining:
+            data = stream.read(min(COPY_BUFFER_SIZE, remaining))
+            if not data:
+                raise UploadError(f'Chunk {index} ended after {expected - remaining} of {expected} bytes')
+            staging.write(data)
+            remaining -= len(data)
+
+    # Only recorded once the bytes are on disk; the condition makes concurrent retries no-ops
+    MediaUpload.objects.filter(pk=upload.pk, status=MediaUpload.Status.UPLOADING).exclude(
+        received_chunks__contains=[index],
+    ).update(
+        received_chunks=Func(F('received_chunks'), Value(index), function='array_append'),
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def complete_upload(upload):
+    """
+    Move a fully received upload into content-addressed storage and return
+    it with its URL set. Completing twice is harmless.
+
+    Copying and hashing a large file takes seconds, so it happens outside any
+    transaction: the row is only locked to claim the upload (status
+    `completing`, which also stops further chunks) and again to publish the URL.
+    """
+    with transaction.atomic():
+        upload = MediaUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == MediaUpload.Status.COMPLETE:
+            return upload
+        if upload.status == MediaUpload.Status.COMPLETING and upload.updated_at > timezone.now() - COMPLETION_LEASE:
+            raise UploadError('Upload is already being completed', status=409)
+        missing = upload.missing_chunks
+        if missing:
+            raise UploadError(f'{len(missing)} chunks are missing, starting with chunk {missing[0]}', status=409)
+        upload.status = MediaUpload.Status.COMPLETING
+        upload.save(update_fields=['status', 'updated_at'])
+
+    path = staging_path(upload)
+    try:
+        # Copied rather than renamed: a late retry of a chunk can only touch the discarded staging file
+        with open(path, 'rb') as staging:
+            url = product_media_storage.save(File(staging, name=upload.filename), upload.kind)
+    except BaseException:
+        MediaUpload.objects.filter(pk=upload.pk, status=MediaUpload.Status.COMPLETING).update(
+            status=MediaUpload.Status.UPLOADING, updated_at=timezone.now(),
+        )
+        raise
+
+    with transaction.atomic():
+        claimed = MediaUpload.objects.filter(pk=upload.pk, status=MediaUpload.Status.COMPLETING).update(
+            status=MediaUpload.Status.COMPLETE, url=url, updated_at=timezone.now(),
+        )
+        if not claimed:
+            # Discarded meanwhile, or a retry that took over an expired claim got there first
+            upload = MediaUpload.objects.filter(pk=upload.pk).first()
+            if upload is None:
+                raise UploadError('Upload is no longer available', status=410)
+            if upload.status != MediaUpload.Status.COMPLETE:
+                raise UploadError('Upload is already being completed', status=409)
+            return upload
+        transaction.on_commit(lambda: _discard_staging(path))
+    upload.status, upload.url = MediaUpload.Status.COMPLETE, url
+    if upload.kind == MediaUpload.Kind.IMAGE:
+        schedule_derivatives([upload.url])
+    return upload
+
+
+def attachable_uploads(owner, ids):
+    """
+    Lock and return the owner's completed, unattached uploads among `ids`
+    (in `ids` order). Must run inside the transaction that attaches them.
+    """
+    uploads = MediaUpload.objects.select_for_update().in_bulk(ids)
+    return [
+        uploads[pk] for pk in ids
+        if pk in uploads
+        and uploads[pk].owner_id == owner.pk
+        and uploads[pk].status == MediaUpload.Status.COMPLETE
+        and uploads[pk].product_id is None
+    ]
+
+
+def discard_upload(upload):
+    """Abandon an upload session and its staging file"""
+    path = staging_path(upload)
+    upload.delete()
+    _discard_staging(path)
+
+
+def _discard_staging(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
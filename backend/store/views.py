@@ -1,5 +1,3 @@
-import os
-import uuid
 import random
 import string
 import time
@@ -11,27 +9,50 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 
-from .models import UserProfile, Category, Product, Order, OrderItem, Cart, CartItem, Payment
+from .models import (
+    UserProfile, Category, Product, ProductListing, ProductChange, ModerationClaim, MediaUpload, Order,
+    OrderItem, Cart, CartItem, Payment
+)
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, ChangePasswordSerializer, 
     PasswordResetSerializer, AdminUserSerializer, CategorySerializer,
-    ProductSerializer, ProductListSerializer, ProductCreateSerializer, 
+    ProductSerializer, ProductListSerializer, ProductListingSerializer, ProductCreateSerializer, 
     ProductApprovalSerializer, ProductSearchSerializer, OrderSerializer,
-    CartSerializer, CartItemSerializer, AddToCartSerializer, 
+    CartSerializer, CartBadgeSerializer, CartItemSerializer, AddToCartSerializer, CartBatchSerializer,
     UpdateCartItemSerializer, CheckoutSerializer, PaymentSerializer, 
-    MpesaPaymentSerializer
+    MpesaPaymentSerializer, BulkModerationSerializer, ModerationReleaseSerializer, MediaUploadSerializer,
+    ProductChangeSerializer, GuestCartSerializer
 )
 from .permissions import IsRoleAdmin
+from .filters import (
+    ProductFilter, ProductFullTextSearchFilter, ProductPriceRangeFilter, StableOrderingFilter
+)
+from .suggest import suggest_product_names
+from .changes import InvalidCursor, read_changes
+from .carts import add_to_cart, apply_cart_operations, cart_items, get_cart, load_cart, lock_cart
+from .checkout import CheckoutError, checkout
+from .guest_carts import (
+    GuestCartFull, apply_guest_operations, clear_guest_cart, guest_cart_summary, load_guest_cart, merge_guest_cart
+)
+from .moderation import CLAIMED, NOT_FOUND, claim_products, moderate_products, release_claims
+from .cache import cached_categories, category_id_for_name
+from .conditional import ConditionalGetMixin
+from .media import product_media_storage
+from .derivatives import schedule_derivatives
+from .product_media import describe_media, primary_media_prefetch
+from .uploads import UploadError, complete_upload, discard_upload, start_upload, write_chunk
+from .facets import FacetedListMixin
 
 User = get_user_model()
 
@@ -66,6 +87,19 @@ class RegisterView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class LoginView(TokenObtainPairView):
+    """JWT login; a guest cart named by `cart_token` is merged into the user's cart"""
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        merge_guest_cart(serializer.user, request.data.get('cart_token') or request.headers.get('X-Cart-Token'))
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
 class VerifyEmailView(APIView):
     """Email verification view"""
     permission_classes = [AllowAny]
@@ -153,6 +187,7 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = AdminUserSerializer
     permission_classes = [IsAuthenticated, IsRoleAdmin]
+    query_budget = 3
 
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -240,12 +275,20 @@ class CategoryListView(generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
+    # Pages are cut from a cached list, so keyset pagination does not apply
+    pagination_class = PageNumberPagination
+    query_budget = 3
     
     def get_permissions(self):
         if self.request.method == 'POST':
             return [IsRoleAdmin()]
         return [AllowAny()]
 
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(cached_categories())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a category"""
@@ -256,23 +299,33 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # ==================== PRODUCT VIEWS ====================
 
-class ProductListView(generics.ListCreateAPIView):
+class ProductListView(FacetedListMixin, generics.ListCreateAPIView):
     """List all products or create a new product"""
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('owner', 'category')
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['category', 'status']
+    query_budget = 5  # count, page, facets, auth, primary images (admin reads)
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter, ProductFullTextSearchFilter]
+    filterset_class = ProductFilter
     search_fields = ['name', 'description']
     ordering_fields = ['date_posted', 'price', 'name']
     ordering = ['-date_posted']
     
+    def reads_listing(self):
+        """Reads that can only see approved products come from the ProductListing read model"""
+        user = self.request.user
+        return self.request.method in permissions.SAFE_METHODS and not (user.is_authenticated and user.is_admin)
+    
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ProductCreateSerializer
+        if self.reads_listing():
+            return ProductListingSerializer
         return ProductListSerializer
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        if self.reads_listing():
+            return ProductListing.objects.all()
+        queryset = super().get_queryset().defer('images', 'videos').prefetch_related(primary_media_prefetch())
         if not self.request.user.is_authenticated or not self.request.user.is_admin:
             queryset = queryset.filter(status=Product.Status.APPROVED)
         return queryset
@@ -283,59 +336,42 @@ class ProductListView(generics.ListCreateAPIView):
         return [AllowAny()]
     
     def create(self, request, *args, **kwargs):
-        images = request.FILES.getlist('images')
-        videos = request.FILES.getlist('videos')
-        
-        image_urls = []
-        video_urls = []
-        
-        for image in images:
-            image_url = self._save_media_file(image, 'images')
-            image_urls.append(image_url)
+        uploads = [(file, 'images') for file in request.FILES.getlist('images')]
+        uploads += [(file, 'videos') for file in request.FILES.getlist('videos')]
+        urls = product_media_storage.save_many(uploads)
+        image_urls = [url for url, (_, folder) in zip(urls, uploads) if folder == 'images']
+        video_urls = [url for url, (_, folder) in zip(urls, uploads) if folder == 'videos']
+        schedule_derivatives(image_urls)
         
-        for video in videos:
-            video_url = self._save_media_file(video, 'videos')
-            video_urls.append(video_url)
-        
-        data = request.data.copy()
+        # A plain dict: on a QueryDict, JSONField would parse str(list) and reject it
+        data = request.data.dict() if hasattr(request.data, 'dict') else dict(request.data)
         data['images'] = image_urls
         data['videos'] = video_urls
+        if hasattr(request.data, 'getlist') and 'uploads' in request.data:
+            data['uploads'] = request.data.getlist('uploads')
         
         if 'category' in data and isinstance(data.get('category'), str):
-            try:
-                category = Category.objects.get(name=data['category'])
-                data['category'] = category.id
-            except Category.DoesNotExist:
-                pass
+            category_id = category_id_for_name(data['category'])
+            if category_id is not None:
+                data['category'] = category_id
         
         serializer = self.get_serializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        with transaction.atomic():  # keeps attached uploads locked until the product exists
+            serializer.is_valid(raise_exception=True)
+            self.perform_create(serializer)
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer):
         product_status = Product.Status.APPROVED if self.request.user.is_admin else Product.Status.PENDING
-        serializer.save(owner=self.request.user, status=product_status)
-    
-    def _save_media_file(self, file, folder):
-        ext = os.path.splitext(file.name)[1]
-        filename = f"{uuid.uuid4()}{ext}"
-        
-        upload_dir = os.path.join(settings.MEDIA_ROOT, f'products/{folder}')
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        filepath = os.path.join(upload_dir, filename)
-        with open(filepath, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
-        
-        return f"/media/products/{folder}/{filename}"
+        product = serializer.save(owner=self.request.user, status=product_status)
+        # The media rows exist once the INSERT trigger has run; their files are already on disk
+        transaction.on_commit(lambda: describe_media(product.media.all()), robust=True)
 
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProductDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a product"""
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('owner', 'category')
     permission_classes = [AllowAny]
 
     def get_queryset(self):
@@ -349,6 +385,11 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
             return queryset
 
         return queryset.filter(Q(status=Product.Status.APPROVED) | Q(owner=user))
+
+    def get_validator_parts(self):
+        return self.get_queryset().filter(pk=self.kwargs['pk']).values_list(
+            'date_updated', 'owner__updated_at', 'category__name'
+        ).first()
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -397,9 +438,10 @@ class MyProductsView(generics.ListAPIView):
     """List products posted by current user"""
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 3
     
     def get_queryset(self):
-        return Product.objects.filter(owner=self.request.user)
+        return Product.objects.filter(owner=self.request.user).select_related('owner', 'category')
 
 
 class ApproveProductView(APIView):
@@ -411,6 +453,7 @@ class ApproveProductView(APIView):
             product = Product.objects.get(pk=product_id)
             product.status = Product.Status.APPROVED
             product.save()
+            ModerationClaim.objects.filter(product=product).delete()
             
             send_mail(
                 'Your Product Has Been Approved',
@@ -443,6 +486,7 @@ class RejectProductView(APIView):
             product.status = Product.Status.REJECTED
             product.rejection_reason = rejection_reason
             product.save()
+            ModerationClaim.objects.filter(product=product).delete()
             
             send_mail(
                 'Your Product Has Been Rejected',
@@ -457,24 +501,72 @@ class RejectProductView(APIView):
             return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+class BulkModerateProductsView(APIView):
+    """Approve and reject many products in one request (admin only)"""
+    permission_classes = [IsAuthenticated, IsRoleAdmin]
+
+    def post(self, request):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = moderate_products(serializer.validated_data['decisions'], moderator=request.user)
+        summary = {key: 0 for key in (Product.Status.APPROVED, Product.Status.REJECTED, NOT_FOUND, CLAIMED)}
+        for result in results:
+            summary[result['result']] += 1
+        return Response({'results': results, **summary}, status=status.HTTP_200_OK)
+
+
+class ModerationQueueClaimView(APIView):
+    """Lease the next batch of pending products to the current moderator (admin only)"""
+    permission_classes = [IsAuthenticated, IsRoleAdmin]
+    query_budget = 3  # auth, claim candidates, lease upsert
+    default_size = 20
+    max_size = 100
+
+    def post(self, request):
+        try:
+            size = int(request.data.get('size', self.default_size))
+        except (TypeError, ValueError):
+            return Response({'error': 'size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        size = max(1, min(size, self.max_size))
+        products, expires_at = claim_products(request.user, size)
+        return Response({
+            'lease_expires_at': expires_at,
+            'results': ProductSerializer(products, many=True).data,
+        })
+
+
+class ModerationQueueReleaseView(APIView):
+    """Return claimed products to the moderation queue (admin only)"""
+    permission_classes = [IsAuthenticated, IsRoleAdmin]
+
+    def post(self, request):
+        serializer = ModerationReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = release_claims(request.user, serializer.validated_data.get('ids'))
+        return Response({'released': released})
+
+
 class PendingProductsView(generics.ListAPIView):
     """List pending products (admin only)"""
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated, IsRoleAdmin]
+    query_budget = 3
     
     def get_queryset(self):
-        return Product.objects.filter(status=Product.Status.PENDING)
+        return Product.objects.filter(status=Product.Status.PENDING).select_related('owner', 'category')
 
 
-class ProductSearchView(generics.ListAPIView):
-    """Search products by name"""
-    serializer_class = ProductListSerializer
+class ProductSearchView(FacetedListMixin, generics.ListAPIView):
+    """Full-text search over approved products, ranked by relevance"""
+    serializer_class = ProductListingSerializer
     permission_classes = [AllowAny]
-    filter_backends = [SearchFilter]
+    filter_backends = [DjangoFilterBackend, ProductFullTextSearchFilter]
+    filterset_class = ProductPriceRangeFilter
     search_fields = ['name', 'description']
+    query_budget = 4  # count, page, facets, auth
     
     def get_queryset(self):
-        queryset = Product.objects.filter(status=Product.Status.APPROVED)
+        queryset = ProductListing.objects.all()
         
         category = self.request.query_params.get('category')
         if category:
@@ -483,15 +575,157 @@ class ProductSearchView(generics.ListAPIView):
         return queryset
 
 
+class ProductSuggestView(APIView):
+    """Lightweight product name autocomplete"""
+    permission_classes = [AllowAny]
+    default_limit = 8
+    max_limit = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '')[:100]
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        return Response({'results': suggest_product_names(query, limit)})
+
+
+class ProductChangesView(APIView):
+    """
+    Catalog changes after `since` (a cursor from a previous response; omit it
+    for a full load), with tombstones for products that left the catalog
+    """
+    permission_classes = [AllowAny]
+    query_budget = 3  # auth, change log page, listing rows
+    default_limit = 500
+    max_limit = 1000
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        try:
+            changes, listings, cursor, has_more = read_changes(request.query_params.get('since'), limit)
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        # An approved entry without a listing row was removed since; its tombstone follows
+        changes = [
+            change for change in changes
+            if change.status != ProductChange.Status.APPROVED or change.product_id in listings
+        ]
+        return Response({
+            'results': ProductChangeSerializer(changes, many=True, context={'listings': listings}).data,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+
+# ==================== UPLOAD VIEWS ====================
+
+class MediaUploadMixin:
+    """Looks up the current user's upload session from the URL"""
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, request, pk):
+        return MediaUpload.objects.filter(owner=request.user, pk=pk).first()
+
+
+class MediaUploadListView(APIView):
+    """Start a resumable upload of a large image or video"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = MediaUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = start_upload(request.user, **serializer.validated_data)
+        return Response(MediaUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+class MediaUploadDetailView(MediaUploadMixin, APIView):
+    """Upload progress (which chunks are still missing), or abandon the upload"""
+
+    def get(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(MediaUploadSerializer(upload).data)
+
+    def delete(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        if upload.product_id is not None:
+            return Response({'error': 'Upload is attached to a product'}, status=status.HTTP_409_CONFLICT)
+        discard_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MediaUploadChunkView(MediaUploadMixin, APIView):
+    """Store one chunk; the raw request body is streamed to disk, never parsed"""
+
+    def put(self, request, pk, index):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Content-Length is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        try:
+            write_chunk(upload, index, request.stream, length)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MediaUploadCompleteView(MediaUploadMixin, APIView):
+    """Finish an upload once every chunk has arrived; returns the media URL"""
+
+    def post(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            upload = complete_upload(upload)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(MediaUploadSerializer(upload).data)
+
+
 # ==================== CART VIEWS ====================
 
-class CartView(generics.RetrieveAPIView):
-    """Get current user's cart"""
+class CartView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """Get current user's cart; `?view=badge` returns only its item count and total"""
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
-    
+    query_budget = 3  # auth, cart row with totals, items
+    private_cache = True
+
+    def is_badge(self):
+        return self.request.query_params.get('view') == 'badge'
+
+    def get_serializer_class(self):
+        return CartBadgeSerializer if self.is_badge() else CartSerializer
+
+    def get_validator_parts(self):
+        # Item and product changes bump Cart.updated_at (database triggers)
+        cart = self.get_cart_row()
+        if cart.pk is None:
+            return None
+        return cart.updated_at, cart.item_count, cart.subtotal, cart.pk, self.is_badge()
+
+    def get_cart_row(self):
+        if not hasattr(self, '_cart'):
+            self._cart = get_cart(self.request.user)
+        return self._cart
+
     def get_object(self):
-        cart, created = Cart.objects.get_or_create(user=self.request.user)
+        cart = self.get_cart_row()
+        if not self.is_badge():
+            cart.lines = cart_items(cart)
         return cart
 
 
@@ -503,27 +737,57 @@ class AddToCartView(APIView):
         serializer = AddToCartSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        product_id = serializer.validated_data['product_id']
-        quantity = serializer.validated_data['quantity']
-        
-        try:
-            product = Product.objects.get(pk=product_id, status=Product.Status.APPROVED)
-        except Product.DoesNotExist:
-            return Response({'error': 'Product not found or not available'}, status=status.HTTP_404_NOT_FOUND)
-        
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
+        quantity = add_to_cart(
+            request.user, serializer.validated_data['product_id'], serializer.validated_data['quantity'],
         )
+        if quantity is None:
+            return Response({'error': 'Product not found or not available'}, status=status.HTTP_404_NOT_FOUND)
         
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
-        
-        return Response({'message': 'Product added to cart'}, status=status.HTTP_201_CREATED)
+        return Response({'message': 'Product added to cart', 'quantity': quantity}, status=status.HTTP_201_CREATED)
+
+
+class CartBatchView(APIView):
+    """Apply many add/set/remove operations to the cart at once and return the cart"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        apply_cart_operations(request.user, serializer.validated_data['operations'])
+        return Response(CartSerializer(load_cart(request.user)).data)
+
+
+class GuestCartView(APIView):
+    """Cart of a shopper who has not logged in, named by the X-Cart-Token header"""
+    permission_classes = [AllowAny]
+    query_budget = 2  # auth, listing rows
+
+    def get(self, request):
+        token = request.headers.get('X-Cart-Token')
+        return Response(GuestCartSerializer(guest_cart_summary(token, load_guest_cart(token))).data)
+
+    def delete(self, request):
+        clear_guest_cart(request.headers.get('X-Cart-Token'))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class GuestCartBatchView(APIView):
+    """
+    Apply add/set/remove operations to a guest cart, starting one (and
+    issuing its `cart_token`) when the request has none
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            token, items = apply_guest_operations(
+                request.headers.get('X-Cart-Token'), serializer.validated_data['operations'],
+            )
+        except GuestCartFull as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(GuestCartSerializer(guest_cart_summary(token, items)).data)
 
 
 class UpdateCartItemView(generics.UpdateAPIView):
@@ -535,6 +799,11 @@ class UpdateCartItemView(generics.UpdateAPIView):
     def get_queryset(self):
         return CartItem.objects.filter(cart__user=self.request.user)
 
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        lock_cart(request.user)
+        return super().update(request, *args, **kwargs)
+
 
 class RemoveCartItemView(generics.DestroyAPIView):
     """Remove item from cart"""
@@ -544,65 +813,51 @@ class RemoveCartItemView(generics.DestroyAPIView):
     def get_queryset(self):
         return CartItem.objects.filter(cart__user=self.request.user)
 
+    @transaction.atomic
+    def destroy(self, request, *args, **kwargs):
+        lock_cart(request.user)
+        return super().destroy(request, *args, **kwargs)
+
 
 class ClearCartView(APIView):
     """Clear all items from cart"""
     permission_classes = [IsAuthenticated]
     
+    @transaction.atomic
     def delete(self, request):
-        try:
-            cart = Cart.objects.get(user=request.user)
-            cart.items.all().delete()
-            return Response({'message': 'Cart cleared'}, status=status.HTTP_204_NO_CONTENT)
-        except Cart.DoesNotExist:
+        cart = lock_cart(request.user)
+        if cart is None:
             return Response({'error': 'Cart not found'}, status=status.HTTP_404_NOT_FOUND)
+        cart.items.all().delete()
+        return Response({'message': 'Cart cleared'}, status=status.HTTP_204_NO_CONTENT)
 
 
 # ==================== ORDER VIEWS ====================
 
+def order_queryset():
+    """Orders with everything OrderSerializer renders loaded up front"""
+    items = OrderItem.objects.select_related('product').defer(
+        'product__images', 'product__videos',
+    ).prefetch_related(primary_media_prefetch('product__media'))
+    return Order.objects.select_related('customer').prefetch_related(Prefetch('items', queryset=items))
+
+
 class CheckoutView(APIView):
     """Process checkout and create order"""
     permission_classes = [IsAuthenticated]
     
-    @transaction.atomic
     def post(self, request):
         serializer = CheckoutSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         try:
-            cart = Cart.objects.get(user=request.user)
-        except Cart.DoesNotExist:
-            return Response({'error': 'Cart not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        if not cart.items.exists():
-            return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        order = Order.objects.create(
-            customer=request.user,
-            total_amount=cart.total
-        )
-        
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
-            )
-        
-        cart.items.all().delete()
-        
-        send_mail(
-            f'Order Confirmation - {order.order_id}',
-            f'Thank you for your order!\n\nOrder ID: {order.order_id}\nTotal Amount: KES {order.total_amount}\nStatus: {order.status}\n\nYou will receive a payment confirmation once payment is processed.',
-            settings.DEFAULT_FROM_EMAIL,
-            [request.user.email],
-            fail_silently=False,
-        )
+            order = checkout(request.user)
+        except CheckoutError as e:
+            return Response({'error': str(e)}, status=e.status)
         
         return Response({
             'message': 'Order created successfully',
-            'order': OrderSerializer(order).data,
+            'order': OrderSerializer(order_queryset().get(pk=order.pk)).data,
             'phone_number': serializer.validated_data['phone_number']
         }, status=status.HTTP_201_CREATED)
 
@@ -611,23 +866,31 @@ class OrderListView(generics.ListAPIView):
     """List orders"""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 4
     
     def get_queryset(self):
         if self.request.user.is_admin:
-            return Order.objects.all()
-        return Order.objects.filter(customer=self.request.user)
+            return order_queryset()
+        return order_queryset().filter(customer=self.request.user)
 
 
-class OrderDetailView(generics.RetrieveAPIView):
+class OrderDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """Get order details"""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     queryset = Order.objects.all()
+    query_budget = 4
+    private_cache = True
+
+    def get_validator_parts(self):
+        return self.get_queryset().prefetch_related(None).filter(pk=self.kwargs['pk']).values_list(
+            'updated_at', 'customer__updated_at'
+        ).first()
     
     def get_queryset(self):
         if self.request.user.is_admin:
-            return Order.objects.all()
-        return Order.objects.filter(customer=self.request.user)
+            return order_queryset()
+        return order_queryset().filter(customer=self.request.user)
 
 
 class CancelOrderView(APIView):
@@ -757,11 +1020,13 @@ class PaymentListView(generics.ListAPIView):
     """List payments"""
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 3
     
     def get_queryset(self):
+        payments = Payment.objects.select_related('order', 'user')
         if self.request.user.is_admin:
-            return Payment.objects.all()
-        return Payment.objects.filter(user=self.request.user)
+            return payments
+        return payments.filter(user=self.request.user)
 
 
 class PaymentDetailView(generics.RetrieveAPIView):
@@ -771,6 +1036,7 @@ class PaymentDetailView(generics.RetrieveAPIView):
     queryset = Payment.objects.all()
     
     def get_queryset(self):
+        payments = Payment.objects.select_related('order', 'user')
         if self.request.user.is_admin:
-            return Payment.objects.all()
-        return Payment.objects.filter(user=self.request.user)
+            return payments
+        return payments.filter(user=self.request.user)
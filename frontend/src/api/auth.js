@@ -3,10 +3,14 @@ import api, { extractList } from './axios'
 export const authAPI = {
   // Login
   login: async (credentials) => {
-    const response = await api.post('/auth/login/', credentials)
+    // A cart built before logging in is merged into the user's cart
+    const cartToken = localStorage.getItem('cart_token')
+    const payload = cartToken ? { ...credentials, cart_token: cartToken } : credentials
+    const response = await api.post('/auth/login/', payload)
     if (response.data.access) {
       localStorage.setItem('access_token', response.data.access)
       localStorage.setItem('refresh_token', response.data.refresh)
+      localStorage.removeItem('cart_token')
     }
     return response.data
   },
@@ -21,30 +21,73 @@ export const productsAPI = {
     return extractList(response.data)
   },
 
+  // Autocomplete product names
+  suggestProducts: async (query, limit = 8) => {
+    const response = await api.get('/products/suggest/', { params: { q: query, limit } })
+    return response.data.results
+  },
+
+  // Catalog changes since a cursor ('0' for everything); pass the returned cursor next time
+  getProductChanges: async (since = '0', limit = 500) => {
+    const response = await api.get('/products/changes/', { params: { since, limit } })
+    return response.data
+  },
+
   // Get user's products
   getMyProducts: async () => {
     const response = await api.get('/products/my/')
     return extractList(response.data)
   },
 
-  // Create product
+  // Upload one large file in resumable chunks; resolves to the completed upload
+  // (pass its id in `uploads` when creating a product). Resumes `uploadId` if given.
+  uploadMedia: async (file, kind, { uploadId, onProgress } = {}) => {
+    let upload = uploadId
+      ? (await api.get(`/uploads/${uploadId}/`)).data
+      : (await api.post('/uploads/', { kind, filename: file.name, size: file.size })).data
+
+    const total = upload.chunk_count
+    let done = total - upload.missing_chunks.length
+    for (const index of upload.missing_chunks) {
+      const start = index * upload.chunk_size
+      const chunk = file.slice(start, Math.min(start + upload.chunk_size, file.size))
+      for (let attempt = 1; ; attempt++) {
+        try {
+          await api.put(`/uploads/${upload.id}/chunks/${index}/`, chunk, {
+            headers: { 'Content-Type': 'application/octet-stream' },
+          })
+          break
+        } catch (error) {
+          if (attempt >= 3 || (error.response && error.response.status < 500)) throw error
+        }
+      }
+      done += 1
+      if (onProgress) onProgress(done / total)
+    }
+
+    const response = await api.post(`/uploads/${upload.id}/complete/`)
+    return response.data
+  },
+
+  // Create product; videos go through resumable uploads, images in the form itself
   createProduct: async (productData) => {
     const formData = productData instanceof FormData ? productData : new FormData()
 
     if (!(productData instanceof FormData)) {
-      Object.keys(productData).forEach((key) => {
+      for (const key of Object.keys(productData)) {
         if (key === 'images') {
           productData.images.forEach((image) => {
             formData.append('images', image)
           })
         } else if (key === 'videos') {
-          productData.videos.forEach((video) => {
-            formData.append('videos', video)
-          })
+          for (const video of productData.videos) {
+            const upload = await productsAPI.uploadMedia(video, 'videos')
+            formData.append('uploads', upload.id)
+          }
         } else {
           formData.append(key, productData[key])
         }
-      })
+      }
     }
 
     const response = await api.post('/products/', formData, {
@@ -85,6 +128,16 @@ export const productsAPI = {
     return response.data
   },
 
+  // Approve/reject many products at once (Admin)
+  // decisions: [{ id, action: 'approve' | 'reject', rejection_reason? }]
+  moderateProducts: async (decisions, rejectionReason) => {
+    const response = await api.post('/products/moderate/', {
+      decisions,
+      ...(rejectionReason ? { rejection_reason: rejectionReason } : {})
+    })
+    return response.data
+  },
+
   // Get all categories
   getCategories: async () => {
     const response = await api.get('/categories/')
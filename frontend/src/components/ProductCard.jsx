@@ -7,8 +7,10 @@ const ProductCard = ({ product }) => {
     return toMediaUrl(image, 'https://via.placeholder.com/300x200?text=No+Image')
   }
 
-  const imageUrl = product.images && product.images.length > 0 
-    ? getImageUrl(product.images[0]) 
+  // Card-sized WebP thumbnail when the API has one, else the original upload
+  const primaryImage = product.thumbnail || product.primary_image
+  const imageUrl = primaryImage
+    ? getImageUrl(primaryImage)
     : 'https://via.placeholder.com/300x200?text=No+Image'
 
   return (
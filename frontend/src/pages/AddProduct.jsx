@@ -88,9 +88,11 @@ const AddProduct = () => {
         productData.append('images', image)
       })
       
-      formData.videos.forEach((video) => {
-        productData.append('videos', video)
-      })
+      // Videos go up in resumable chunks first and are attached by upload id
+      for (const video of formData.videos) {
+        const upload = await productsAPI.uploadMedia(video, 'videos')
+        productData.append('uploads', upload.id)
+      }
 
       // Only append category if it's not empty
       if (formData.category) {
@@ -84,6 +84,19 @@ const AdminDashboard = () => {
     }
   }
 
+  const handleApproveAll = async () => {
+    if (!window.confirm(`Approve all ${pendingProducts.length} pending products?`)) return
+    try {
+      await productsAPI.moderateProducts(
+        pendingProducts.map(p => ({ id: p.id, action: 'approve' }))
+      )
+      setPendingProducts([])
+      fetchData()
+    } catch (err) {
+      alert('Failed to approve products')
+    }
+  }
+
   const handleBlockUser = async (userId) => {
     try {
       await authAPI.blockUser(userId)
@@ -211,6 +224,11 @@ const AdminDashboard = () => {
         {activeTab === 'products' && (
           <div className="products-section">
             <h2>Pending Products</h2>
+            {pendingProducts.length > 1 && (
+              <button className="approve-btn" onClick={handleApproveAll}>
+                Approve all ({pendingProducts.length})
+              </button>
+            )}
             {pendingProducts.length === 0 ? (
               <p className="no-items">No pending products</p>
             ) : (
@@ -260,9 +278,9 @@ const AdminDashboard = () => {
                 {allProducts.map((product) => (
                   <div key={product.id} className="product-item">
                     <div className="product-image">
-                      {product.images && product.images.length > 0 ? (
+                      {product.thumbnail || product.primary_image ? (
                         <img 
-                          src={getImageUrl(product.images[0])} 
+                          src={getImageUrl(product.thumbnail || product.primary_image)} 
                           alt={product.name}
                           onError={(e) => {
                             e.target.src = 'https://via.placeholder.com/100x75?text=No+Image'